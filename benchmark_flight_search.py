@@ -0,0 +1,115 @@
+# Copyright Sierra
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from tau_bench.envs.airline.data import load_baseline_data
+from tau_bench.envs.airline.tools.search_onestop_flight import (
+    SearchOnestopFlightWithoutSort,
+)
+from tau_bench.envs.db import copy_on_write, load_baseline
+
+
+def search_onestop_flight_by_scan(
+    data: Dict[str, Any], origin: str, destination: str, date: str
+) -> List[List[Dict[str, Any]]]:
+    # the implementation before the route index, kept as the reference
+    flights = data["flights"]
+    results = []
+    for flight1 in flights.values():
+        if flight1["origin"] == origin:
+            for flight2 in flights.values():
+                if (
+                    flight2["destination"] == destination
+                    and flight1["destination"] == flight2["origin"]
+                ):
+                    date2 = (
+                        f"2024-05-{int(date[-2:])+1}"
+                        if "+1" in flight1["scheduled_arrival_time_est"]
+                        else date
+                    )
+                    if (
+                        flight1["scheduled_arrival_time_est"]
+                        > flight2["scheduled_departure_time_est"]
+                    ):
+                        continue
+                    if date in flight1["dates"] and date2 in flight2["dates"]:
+                        if (
+                            flight1["dates"][date]["status"] == "available"
+                            and flight2["dates"][date2]["status"] == "available"
+                        ):
+                            result1 = {k: v for k, v in flight1.items() if k != "dates"}
+                            result1.update(flight1["dates"][date])
+                            result1["date"] = date
+                            result2 = {k: v for k, v in flight2.items() if k != "dates"}
+                            result2.update(flight2["dates"][date])
+                            result2["date"] = date2
+                            results.append([result1, result2])
+    return results
+
+
+def call(search: Callable, data: Dict[str, Any], query: Tuple[str, str, str]) -> Any:
+    # errors are compared too, since the tools surface them to the agent
+    try:
+        return search(data, *query)
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def time_queries(
+    search: Callable, data: Dict[str, Any], queries: List[Tuple[str, str, str]]
+) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        call(search, data, query)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    baseline = load_baseline(load_baseline_data)
+    airports = sorted({flight["origin"] for flight in baseline["flights"].values()})
+    dates = sorted({date for flight in baseline["flights"].values() for date in flight["dates"]})
+    queries = [
+        (origin, destination, random.choice(dates))
+        for origin, destination in (
+            random.sample(airports, 2) for _ in range(args.num_queries)
+        )
+    ]
+
+    data = copy_on_write(baseline)
+    # an episode that has looked up and changed some flights, which the index must see through
+    for flight_number in random.sample(sorted(baseline["flights"]), 50):
+        flight = data["flights"][flight_number]
+        for date_data in flight["dates"].values():
+            if random.random() < 0.2:
+                date_data["status"] = "cancelled"
+
+    new = SearchOnestopFlightWithoutSort.invoke
+    for name, data in [("baseline", copy_on_write(baseline)), ("episode", data)]:
+        mismatches = sum(
+            call(search_onestop_flight_by_scan, data, query) != call(new, data, query)
+            for query in queries
+        )
+        num_results = sum(len(call(new, data, query)) for query in queries)
+        print(
+            f"{name}: {len(queries)} queries, {num_results} itineraries, {mismatches} mismatches"
+        )
+        scan_time = time_queries(search_onestop_flight_by_scan, data, queries)
+        index_time = time_queries(new, data, queries)
+        print(
+            f"  scan: {scan_time / len(queries) * 1000:.3f} ms/query, "
+            f"index: {index_time / len(queries) * 1000:.3f} ms/query, "
+            f"speedup: {scan_time / index_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Copyright Sierra
+
+import argparse
+import io
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from tau_bench.envs import get_env
+from tau_bench.envs.base import Env
+from tau_bench.serializer import SERIALIZERS, get_serializer, set_serializer
+
+SPLITS = [("retail", "test"), ("airline", "test")]
+
+
+def replay(env: Env) -> Tuple[List[str], List[str], List[float]]:
+    """Replays the ground truth actions of every task, returning the tool observations,
+    the final data hashes and the rewards."""
+    # cached observations were written by the previous serializer
+    env.tool_cache = {}
+    observations, data_hashes, rewards = [], [], []
+    for task_index, task in enumerate(env.tasks):
+        env.set_task(task_index)
+        for action in task.actions:
+            observations.append(env.step(action).observation)
+        data_hashes.append(env.get_data_hash())
+        rewards.append(env.calculate_reward().reward)
+    return observations, data_hashes, rewards
+
+
+def parse(observation: str) -> Any:
+    # errors and plain-text observations are compared as they are
+    try:
+        return json.loads(observation)
+    except ValueError:
+        return observation
+
+
+def time_dumps(objs: List[Any], repeat: int) -> float:
+    serializer = get_serializer()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for obj in objs:
+            serializer.dumps(obj)
+    return time.perf_counter() - start
+
+
+def time_dump_results(results: List[Dict[str, Any]], repeat: int) -> float:
+    serializer = get_serializer()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serializer.dump_results(results, io.StringIO(), cls=json.JSONEncoder)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--results-path",
+        type=str,
+        default="historical_trajectories/gpt-4o-airline.json",
+        help="A results checkpoint to time checkpoint writing with",
+    )
+    args = parser.parse_args()
+
+    with open(args.results_path, "r") as f:
+        results = json.load(f)
+    for env_name, task_split in SPLITS:
+        env = get_env(
+            env_name,
+            user_strategy="human",
+            user_model="gpt-4o",
+            task_split=task_split,
+            task_index=0,
+        )
+        replays = {}
+        for name in SERIALIZERS:
+            # set_serializer falls back to the standard library if orjson is not installed
+            installed = set_serializer(name).name == name
+            replays[name] = replay(env) if installed else None
+        reference, data_hashes, rewards = replays["json"]
+        # what the tools dumped, to time each serializer on the same objects
+        objs = [parse(observation) for observation in reference]
+        print(f"{env_name}/{task_split}: {len(env.tasks)} tasks, {len(reference)} steps")
+        for name, replayed in replays.items():
+            if replayed is None:
+                print(f"  {name}: not installed")
+                continue
+            observations, replayed_hashes, replayed_rewards = replayed
+            identical = sum(a == b for a, b in zip(reference, observations))
+            equal = sum(parse(a) == parse(b) for a, b in zip(reference, observations))
+            set_serializer(name)
+            dumps_time = time_dumps(objs, args.repeat)
+            dump_results_time = time_dump_results(results, args.repeat)
+            print(
+                f"  {name}: {identical} byte-identical and {equal} equal observations, "
+                f"data hashes {'same' if replayed_hashes == data_hashes else 'DIFFERENT'}, "
+                f"rewards {'same' if replayed_rewards == rewards else 'DIFFERENT'}"
+            )
+            print(
+                f"    dumps: {dumps_time / (len(objs) * args.repeat) * 1e6:.1f} us/observation, "
+                f"checkpoint of {len(results)} results: {dump_results_time / args.repeat * 1000:.1f} ms"
+            )
+    set_serializer("json")
+
+
+if __name__ == "__main__":
+    main()
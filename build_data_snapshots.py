@@ -0,0 +1,35 @@
+# Copyright Sierra
+
+import argparse
+import importlib
+from tau_bench.envs.snapshot import build_snapshot
+from tau_bench.envs.task_store import build_task_store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--env",
+        type=str,
+        nargs="+",
+        choices=["retail", "airline"],
+        default=["retail", "airline"],
+        help="The environments to build the binary data snapshots and task stores for",
+    )
+    args = parser.parse_args()
+    for env_name in args.env:
+        data_module = importlib.import_module(f"tau_bench.envs.{env_name}.data")
+        build_snapshot(
+            data_module.SNAPSHOT_PATH,
+            data_module.load_data(),
+            data_module.DATA_FILE_PATHS,
+        )
+        print(f"Data snapshot for {env_name} saved to {data_module.SNAPSHOT_PATH}")
+        env_module = importlib.import_module(f"tau_bench.envs.{env_name}.env")
+        for task_split, (module_name, attr) in env_module.TASK_SPLITS.items():
+            path = build_task_store(module_name, attr)
+            print(f"Task store for {env_name} {task_split} saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# Copyright Sierra
+
+import argparse
+from tau_bench.envs.gt_data_hashes import ENV_TASK_SPLITS, build_gt_data_hashes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--env",
+        type=str,
+        nargs="+",
+        choices=list(ENV_TASK_SPLITS.keys()),
+        default=list(ENV_TASK_SPLITS.keys()),
+        help="The environments to precompute the ground truth data hashes for",
+    )
+    args = parser.parse_args()
+    for env_name in args.env:
+        path = build_gt_data_hashes(env_name)
+        print(f"Ground truth data hashes for {env_name} saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Copyright Sierra
+
+import argparse
+import os
+
+from tau_bench.checkpoint import convert_checkpoint
+from tau_bench.serializer import set_serializer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the JSONL checkpoint of a run, e.g. one that stopped early, into its JSON results"
+    )
+    parser.add_argument("checkpoint_path", type=str)
+    parser.add_argument(
+        "--output-path",
+        type=str,
+        help="Defaults to the checkpoint path with a .json extension",
+    )
+    parser.add_argument(
+        "--serializer", type=str, default="json", choices=["json", "orjson"]
+    )
+    args = parser.parse_args()
+    set_serializer(args.serializer)
+    output_path = (
+        args.output_path or f"{os.path.splitext(args.checkpoint_path)[0]}.json"
+    )
+    results = convert_checkpoint(args.checkpoint_path, output_path)
+    print(f"{len(results)} results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
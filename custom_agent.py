@@ -149,7 +149,13 @@ class CustomToolCallingAgent(ToolCallingAgent):
                     actual_task_actions.append(action)
                     if tool_name in WRITE_TOOL_NAMES:
                         actual_write_task_actions.append(action)
-                return fn(data=env.data, *args, **kwargs)
+                try:
+                    return fn(data=env.data, *args, **kwargs)
+                finally:
+                    # even if it raised, a write tool may have changed env.data, which
+                    # invalidates the env's cache of read-only tool results
+                    if not env.tools_map[tool_name].read_only:
+                        env.bump_data_version()
 
             return wrapped_fn
 
@@ -228,6 +234,11 @@ class CustomToolCallingAgent(ToolCallingAgent):
                         )
                         reward = env_response.reward
                         info = {**info, **env_response.info.model_dump()}
+                        if env.pending_reward is not None:
+                            # graded in the env's reward executor, which left 0.0 in the response
+                            reward_res = env.pending_reward.result()
+                            reward = reward_res.reward
+                            info["reward_info"] = reward_res.model_dump()
 
                         if need_user_input:
                             AE.add_user_turn(env_response.observation)
@@ -70,6 +70,87 @@ def parse_args() -> RunConfig:
         default=1,
         help="Number of tasks to run in parallel",
     )
+    parser.add_argument(
+        "--num-processes",
+        type=int,
+        default=1,
+        help="If > 1, run tasks in this many worker processes that share one memory-mapped database instead of --max-concurrency threads; cannot be combined with --max-concurrency > 1, --use-async or --reward-processes",
+    )
+    parser.add_argument(
+        "--use-async",
+        action="store_true",
+        help="Run episodes in one asyncio event loop, up to --max-concurrency at a time, instead of in threads",
+    )
+    parser.add_argument(
+        "--extra-tools",
+        action="store_true",
+        help="Also offer the agent the env's opt-in tools that are not part of the benchmark's tool set (airline: search_itineraries)",
+    )
+    parser.add_argument(
+        "--lean-step-info",
+        action="store_true",
+        help=(
+            "Reference the task by id in step infos and attach the full task to each result once. "
+            "Step infos then have task None and a task_id, which Env.get_info_task looks the task up by; "
+            "saved results still have info['task']"
+        ),
+    )
+    parser.add_argument(
+        "--reward-processes",
+        type=int,
+        default=0,
+        help="If > 0, replay the ground truth actions for rewards in this many processes instead of on the agent threads",
+    )
+    parser.add_argument(
+        "--parallel-tool-calls",
+        action="store_true",
+        help="Execute every tool call of an assistant message instead of only the first (tool-calling agent only)",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        help="Path to the checkpoint (.jsonl) or results (.json) of an earlier run with the same arguments; only its missing (task, trial) pairs are run",
+    )
+    parser.add_argument(
+        "--model-rpm",
+        type=int,
+        help="Requests per minute allowed by the agent model provider, across all tasks",
+    )
+    parser.add_argument(
+        "--model-tpm",
+        type=int,
+        help="Tokens per minute allowed by the agent model provider, across all tasks",
+    )
+    parser.add_argument(
+        "--user-model-rpm",
+        type=int,
+        help="Requests per minute allowed by the user model provider, across all tasks",
+    )
+    parser.add_argument(
+        "--user-model-tpm",
+        type=int,
+        help="Tokens per minute allowed by the user model provider, across all tasks",
+    )
+    parser.add_argument(
+        "--schedule-from",
+        type=str,
+        nargs="+",
+        help="Checkpoints or results of earlier runs of the same env and split; the tasks that took longest in them are started first",
+    )
+    parser.add_argument(
+        "--schedule-by",
+        type=str,
+        default="turns",
+        choices=["turns", "duration"],
+        help="Measure the length of a task in --schedule-from by its number of messages, or by its wall-clock time",
+    )
+    parser.add_argument(
+        "--serializer",
+        type=str,
+        default="json",
+        choices=["json", "orjson"],
+        help="The JSON serializer for tool observations and result checkpoints; orjson is faster but writes compact JSON",
+    )
     parser.add_argument("--seed", type=int, default=10)
     parser.add_argument("--shuffle", type=int, default=0)
     parser.add_argument("--user-strategy", type=str, default="llm", choices=[item.value for item in UserStrategy])
@@ -91,6 +172,20 @@ def parse_args() -> RunConfig:
         task_ids=args.task_ids,
         log_dir=args.log_dir,
         max_concurrency=args.max_concurrency,
+        num_processes=args.num_processes,
+        use_async=args.use_async,
+        extra_tools=args.extra_tools,
+        lean_step_info=args.lean_step_info,
+        reward_processes=args.reward_processes,
+        parallel_tool_calls=args.parallel_tool_calls,
+        resume_path=args.resume,
+        model_rpm=args.model_rpm,
+        model_tpm=args.model_tpm,
+        user_model_rpm=args.user_model_rpm,
+        user_model_tpm=args.user_model_tpm,
+        schedule_paths=args.schedule_from,
+        schedule_by=args.schedule_by,
+        serializer=args.serializer,
         seed=args.seed,
         shuffle=args.shuffle,
         user_strategy=args.user_strategy,
@@ -1,7 +1,8 @@
 # Copyright Sierra
 
 import abc
-from typing import Optional
+import asyncio
+from typing import Any, Optional
 from tau_bench.envs.base import Env
 from tau_bench.types import SolveResult
 
@@ -12,3 +13,9 @@ class Agent(abc.ABC):
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
     ) -> SolveResult:
         raise NotImplementedError
+
+    async def asolve(
+        self, env: Env, task_index: Optional[int] = None, **kwargs: Any
+    ) -> SolveResult:
+        # agents that are not natively async run solve in a thread
+        return await asyncio.to_thread(self.solve, env, task_index, **kwargs)
@@ -2,7 +2,7 @@
 
 import json
 import random
-from litellm import completion
+from tau_bench.rate_limit import completion
 from typing import List, Optional, Dict, Any
 
 from tau_bench.agents.base import Agent
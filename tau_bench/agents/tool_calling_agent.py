@@ -1,12 +1,12 @@
 # Copyright Sierra
 
 import json
-from litellm import completion
+from tau_bench.rate_limit import acompletion, completion
 from typing import List, Optional, Dict, Any
 
 from tau_bench.agents.base import Agent
 from tau_bench.envs.base import Env
-from tau_bench.types import SolveResult, Action, RESPOND_ACTION_NAME
+from tau_bench.types import SolveResult, Action, EnvResponse, RESPOND_ACTION_NAME
 
 
 class ToolCallingAgent(Agent):
@@ -17,12 +17,15 @@ class ToolCallingAgent(Agent):
         model: str,
         provider: str,
         temperature: float = 0.0,
+        parallel_tool_calls: bool = False,
     ):
         self.tools_info = tools_info
         self.wiki = wiki
         self.model = model
         self.provider = provider
         self.temperature = temperature
+        # if True, every tool call of an assistant message is executed instead of only the first
+        self.parallel_tool_calls = parallel_tool_calls
 
     def solve(
         self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
@@ -46,31 +49,16 @@ class ToolCallingAgent(Agent):
             )
             next_message = res.choices[0].message.model_dump()
             total_cost += res._hidden_params["response_cost"]
-            action = message_to_action(next_message)
-            env_response = env.step(action)
-            reward = env_response.reward
-            info = {**info, **env_response.info.model_dump()}
-            if action.name != RESPOND_ACTION_NAME:
-                next_message["tool_calls"] = next_message["tool_calls"][:1]
-                messages.extend(
-                    [
-                        next_message,
-                        {
-                            "role": "tool",
-                            "tool_call_id": next_message["tool_calls"][0]["id"],
-                            "name": next_message["tool_calls"][0]["function"]["name"],
-                            "content": env_response.observation,
-                        },
-                    ]
-                )
+            actions = message_to_actions(next_message)
+            if self.parallel_tool_calls and len(actions) > 1:
+                env_responses = env.step_tool_calls(actions)
             else:
-                messages.extend(
-                    [
-                        next_message,
-                        {"role": "user", "content": env_response.observation},
-                    ]
-                )
-            if env_response.done:
+                env_responses = [env.step(actions[0])]
+            for env_response in env_responses:
+                reward = env_response.reward
+                info = {**info, **env_response.info.model_dump()}
+            add_turn(messages, next_message, actions[0], env_responses)
+            if env_responses[-1].done:
                 break
         return SolveResult(
             reward=reward,
@@ -79,19 +67,103 @@ class ToolCallingAgent(Agent):
             total_cost=total_cost,
         )
 
+    async def asolve(
+        self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
+    ) -> SolveResult:
+        """Same as `solve`, awaiting the agent's and the user's LLM calls instead of blocking on them."""
+        total_cost = 0.0
+        env_reset_res = await env.areset(task_index=task_index)
+        obs = env_reset_res.observation
+        info = env_reset_res.info.model_dump()
+        reward = 0.0
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": self.wiki},
+            {"role": "user", "content": obs},
+        ]
+        for _ in range(max_num_steps):
+            res = await acompletion(
+                messages=messages,
+                model=self.model,
+                custom_llm_provider=self.provider,
+                tools=self.tools_info,
+                temperature=self.temperature,
+            )
+            next_message = res.choices[0].message.model_dump()
+            total_cost += res._hidden_params["response_cost"]
+            actions = message_to_actions(next_message)
+            if self.parallel_tool_calls and len(actions) > 1:
+                env_responses = await env.astep_tool_calls(actions)
+            else:
+                env_responses = [await env.astep(actions[0])]
+            for env_response in env_responses:
+                reward = env_response.reward
+                info = {**info, **env_response.info.model_dump()}
+            add_turn(messages, next_message, actions[0], env_responses)
+            if env_responses[-1].done:
+                break
+        return SolveResult(
+            reward=reward,
+            info=info,
+            messages=messages,
+            total_cost=total_cost,
+        )
+
+
+def add_turn(
+    messages: List[Dict[str, Any]],
+    next_message: Dict[str, Any],
+    action: Action,
+    env_responses: List[EnvResponse],
+) -> None:
+    """Adds the assistant message and the responses to the actions in it to the messages."""
+    if action.name == RESPOND_ACTION_NAME:
+        messages.extend(
+            [
+                next_message,
+                {"role": "user", "content": env_responses[0].observation},
+            ]
+        )
+        return
+    # every tool call in the message needs a result, so drop the ones that were not executed
+    next_message["tool_calls"] = next_message["tool_calls"][: len(env_responses)]
+    messages.append(next_message)
+    messages.extend(
+        {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "name": tool_call["function"]["name"],
+            "content": env_response.observation,
+        }
+        for tool_call, env_response in zip(next_message["tool_calls"], env_responses)
+    )
+
 
 def message_to_action(
     message: Dict[str, Any],
 ) -> Action:
     if "tool_calls" in message and message["tool_calls"] is not None and len(message["tool_calls"]) > 0 and message["tool_calls"][0]["function"] is not None:
-        tool_call = message["tool_calls"][0]
-
-        # openrouter formats empty tool call arguments as '', which is not valid JSON
-        if tool_call["function"]["arguments"] == "":
-            tool_call["function"]["arguments"] = "{}"
-        return Action(
-            name=tool_call["function"]["name"],
-            kwargs=json.loads(tool_call["function"]["arguments"]),
-        )
+        return tool_call_to_action(message["tool_calls"][0])
     else:
         return Action(name=RESPOND_ACTION_NAME, kwargs={"content": message["content"]})
+
+
+def message_to_actions(
+    message: Dict[str, Any],
+) -> List[Action]:
+    # the leading tool calls that have a function, or the first action if there are none
+    actions = []
+    for tool_call in message.get("tool_calls") or []:
+        if tool_call["function"] is None:
+            break
+        actions.append(tool_call_to_action(tool_call))
+    return actions or [message_to_action(message)]
+
+
+def tool_call_to_action(tool_call: Dict[str, Any]) -> Action:
+    # openrouter formats empty tool call arguments as '', which is not valid JSON
+    if tool_call["function"]["arguments"] == "":
+        tool_call["function"]["arguments"] = "{}"
+    return Action(
+        name=tool_call["function"]["name"],
+        kwargs=json.loads(tool_call["function"]["arguments"]),
+    )
@@ -0,0 +1,161 @@
+# Copyright Sierra
+
+"""Append-only checkpoints of the results of a run.
+
+Each result is written as one line of compact JSON as soon as its task finishes, so the
+cost of checkpointing a result doesn't grow with the number of results before it. The
+JSONL checkpoint can be converted into the JSON list of results that a finished run saves.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from tau_bench.serializer import get_serializer
+from tau_bench.types import EnvRunResult
+
+CHECKPOINT_SUFFIX = ".jsonl"
+
+_CLOSE = object()
+
+
+class CheckpointWriter(object):
+    """Appends results to a JSONL checkpoint from a dedicated thread.
+
+    `write` only queues the result, so tasks never wait on serialization or disk I/O.
+    The writer thread writes whatever has been queued in one go, and fsyncs at most once
+    every `fsync_interval` seconds, and on `close`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        json_encoder: Optional[Type[json.JSONEncoder]] = None,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.json_encoder = json_encoder
+        self.fsync_interval = fsync_interval
+        self.serializer = get_serializer()
+        # a resumed run appends to the checkpoint of the run that stopped
+        drop_partial_line(path)
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, result: EnvRunResult) -> None:
+        self.queue.put(result)
+
+    def close(self) -> None:
+        """Waits until every queued result is written and synced to disk."""
+        self.queue.put(_CLOSE)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> "CheckpointWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        try:
+            self._write_until_closed()
+        except Exception as e:
+            # e.g. a full disk; surfaced by close, and nothing more is written after it
+            self.error = e
+
+    def _write_until_closed(self) -> None:
+        closed = False
+        unsynced = False
+        last_sync = time.monotonic()
+        with open(self.path, "a") as f:
+            while not closed:
+                timeout = None
+                if unsynced:
+                    timeout = max(0.0, last_sync + self.fsync_interval - time.monotonic())
+                try:
+                    batch = [self.queue.get(timeout=timeout)]
+                except queue.Empty:
+                    batch = []
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                lines = []
+                for item in batch:
+                    if item is _CLOSE:
+                        closed = True
+                    elif self.error is None:
+                        try:
+                            lines.append(self._dump_line(item))
+                        except Exception as e:
+                            # surfaced by close, rather than failing the task that finished
+                            self.error = e
+                if lines:
+                    f.write("".join(lines))
+                    f.flush()
+                    unsynced = True
+                if unsynced and (
+                    closed or time.monotonic() - last_sync >= self.fsync_interval
+                ):
+                    os.fsync(f.fileno())
+                    unsynced = False
+                    last_sync = time.monotonic()
+
+    def _dump_line(self, result: EnvRunResult) -> str:
+        return self.serializer.dump_line(result.model_dump(), cls=self.json_encoder) + "\n"
+
+
+def drop_partial_line(path: str) -> None:
+    # a run that stopped while writing a result leaves a line without a newline, which
+    # would run into the next result appended to the checkpoint
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_checkpoint(path: str) -> List[Dict[str, Any]]:
+    """Loads the results in a JSONL checkpoint, or in the JSON results of a finished run.
+
+    The last line of a JSONL checkpoint is skipped if the run stopped while writing it. A
+    resumed run appends the results of the pairs that failed again, so only the last result
+    of each (task, trial) pair is kept.
+    """
+    with open(path, "r") as f:
+        if not path.endswith(CHECKPOINT_SUFFIX):
+            return json.load(f)
+        lines = f.read().splitlines()
+    results: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            result = json.loads(line)
+        except ValueError:
+            if i < len(lines) - 1:
+                raise
+            continue
+        results[(result["task_id"], result["trial"])] = result
+    return list(results.values())
+
+
+def convert_checkpoint(
+    checkpoint_path: str,
+    output_path: str,
+    json_encoder: Optional[Type[json.JSONEncoder]] = None,
+) -> List[Dict[str, Any]]:
+    """Writes the results in a JSONL checkpoint as the JSON list of results saved by a finished run."""
+    results = load_checkpoint(checkpoint_path)
+    with open(output_path, "w") as f:
+        get_serializer().dump_results(results, f, cls=json_encoder)
+    return results
@@ -12,8 +12,11 @@ def get_env(
     task_split: str,
     user_provider: Optional[str] = None,
     task_index: Optional[int] = None,
+    extra_tools: bool = False,
 ) -> Env:
     if env_name == "retail":
+        if extra_tools:
+            raise ValueError("The retail env has no extra tools")
         from tau_bench.envs.retail import MockRetailDomainEnv
 
         return MockRetailDomainEnv(
@@ -32,6 +35,7 @@ def get_env(
             task_split=task_split,
             user_provider=user_provider,
             task_index=task_index,
+            extra_tools=extra_tools,
         )
     else:
         raise ValueError(f"Unknown environment: {env_name}")
@@ -2,9 +2,18 @@
 
 import json
 import os
+from functools import lru_cache
 from typing import Any
 
+from tau_bench.envs.db import fingerprint_files
+from tau_bench.envs.snapshot import SNAPSHOT_FILE_NAME, load_snapshot
+
 FOLDER_PATH = os.path.dirname(__file__)
+DATA_FILE_PATHS = [
+    os.path.join(FOLDER_PATH, file_name)
+    for file_name in ["flights.json", "reservations.json", "users.json"]
+]
+SNAPSHOT_PATH = os.path.join(FOLDER_PATH, SNAPSHOT_FILE_NAME)
 
 
 def load_data() -> dict[str, Any]:
@@ -19,3 +28,16 @@ def load_data() -> dict[str, Any]:
         "reservations": reservation_data,
         "users": user_data,
     }
+
+
+@lru_cache(maxsize=None)
+def get_data_fingerprint() -> str:
+    return fingerprint_files(DATA_FILE_PATHS)
+
+
+def load_baseline_data() -> dict[str, Any]:
+    # the JSON files stay the source of truth; the snapshot is only used while it is up to date
+    snapshot = load_snapshot(SNAPSHOT_PATH, DATA_FILE_PATHS)
+    if snapshot is not None:
+        return snapshot
+    return load_data()
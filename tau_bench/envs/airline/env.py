@@ -1,13 +1,24 @@
 # Copyright Sierra
 
-from tau_bench.envs.airline.data import load_data
+from tau_bench.envs.airline.data import (
+    FOLDER_PATH,
+    get_data_fingerprint,
+    load_baseline_data,
+)
 from tau_bench.envs.airline.rules import RULES
-from tau_bench.envs.airline.tools import ALL_TOOLS
+from tau_bench.envs.airline.tools import ALL_TOOLS, EXTRA_TOOLS
 from tau_bench.envs.airline.wiki import WIKI
 from tau_bench.envs.base import Env
+from tau_bench.envs.gt_data_hashes import load_gt_data_hashes
+from tau_bench.envs.task_store import load_tasks
 from typing import Optional, Union
 from tau_bench.envs.user import UserStrategy
 
+TASK_SPLITS = {
+    "test": ("tau_bench.envs.airline.tasks_test", "TASKS"),
+    "revised_test": ("tau_bench.envs.airline.revised_tasks_test", "TASKS"),
+}
+
 
 class MockAirlineDomainEnv(Env):
     def __init__(
@@ -17,17 +28,14 @@ class MockAirlineDomainEnv(Env):
         user_provider: Optional[str] = None,
         task_split: str = "test",
         task_index: Optional[int] = None,
+        extra_tools: bool = False,
     ):
-        match task_split:
-            case "test":
-                from tau_bench.envs.airline.tasks_test import TASKS as tasks
-            case "revised_test":
-                from tau_bench.envs.airline.revised_tasks_test import TASKS as tasks
-            case _:
-                raise ValueError(f"Unknown task split: {task_split}")
+        if task_split not in TASK_SPLITS:
+            raise ValueError(f"Unknown task split: {task_split}")
+        tasks = load_tasks(*TASK_SPLITS[task_split])
         super().__init__(
-            data_load_func=load_data,
-            tools=ALL_TOOLS,
+            data_load_func=load_baseline_data,
+            tools=ALL_TOOLS + EXTRA_TOOLS if extra_tools else ALL_TOOLS,
             tasks=tasks,
             wiki=WIKI,
             rules=RULES,
@@ -35,5 +43,6 @@ class MockAirlineDomainEnv(Env):
             user_model=user_model,
             user_provider=user_provider,
             task_index=task_index,
+            gt_data_hashes=load_gt_data_hashes(FOLDER_PATH, get_data_fingerprint()),
         )
         self.terminate_tools = ["transfer_to_human_agents"]
@@ -0,0 +1,29 @@
+# Copyright Sierra
+
+from typing import Any, Dict, List, Tuple
+
+from tau_bench.envs.db import TableIndex
+
+
+def get_route_keys(flight: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [(flight["origin"], flight["destination"])]
+
+
+def get_departure_keys(flight: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [(flight["origin"], date) for date in flight["dates"]]
+
+
+def get_availability_keys(flight: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    return [
+        (flight["origin"], flight["destination"], date)
+        for date, flight_date in flight["dates"].items()
+        if flight_date["status"] == "available"
+    ]
+
+
+# (origin, destination) -> flights, and (origin, date) -> flights scheduled that day
+ROUTE_INDEX = TableIndex(get_route_keys)
+DEPARTURE_INDEX = TableIndex(get_departure_keys)
+# (origin, destination, date) -> flights available for booking that day; seats and prices
+# are read from the flight itself, so bookings never leave the index stale
+AVAILABILITY_INDEX = TableIndex(get_availability_keys)
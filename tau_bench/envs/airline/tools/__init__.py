@@ -7,6 +7,7 @@ from .get_reservation_details import GetReservationDetails
 from .get_user_details import GetUserDetails
 from .list_all_airports import ListAllAirports
 from .search_direct_flight import SearchDirectFlight
+from .search_itineraries import SearchItineraries
 from .search_onestop_flight import SearchOnestopFlight
 from .sort_flights import SortFlights
 from .send_certificate import SendCertificate
@@ -33,3 +34,8 @@ ALL_TOOLS = [
     UpdateReservationFlights,
     UpdateReservationPassengers,
 ]
+
+# opt-in tools, left out of ALL_TOOLS so that agents see the benchmark's original tool set
+EXTRA_TOOLS = [
+    SearchItineraries,
+]
@@ -1,8 +1,8 @@
 # Copyright Sierra
 
-import json
 from copy import deepcopy
 from typing import Any, Dict, List
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -105,7 +105,7 @@ class BookReservation(Tool):
 
         reservations[reservation_id] = reservation
         user["reservations"].append(reservation_id)
-        return json.dumps(reservation)
+        return serializer.dumps(reservation)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -29,7 +29,7 @@ class CancelReservation(Tool):
             )
         reservation["payment_history"].extend(refunds)
         reservation["status"] = "cancelled"
-        return json.dumps(reservation)
+        return serializer.dumps(reservation)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
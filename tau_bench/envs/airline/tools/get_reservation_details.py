@@ -1,16 +1,18 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
 class GetReservationDetails(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], reservation_id: str) -> str:
         reservations = data["reservations"]
         if reservation_id in reservations:
-            return json.dumps(reservations[reservation_id])
+            return serializer.dumps(reservations[reservation_id])
         return "Error: user not found"
 
     @staticmethod
@@ -1,16 +1,18 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
 class GetUserDetails(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], user_id: str) -> str:
         users = data["users"]
         if user_id in users:
-            return json.dumps(users[user_id])
+            return serializer.dumps(users[user_id])
         return "Error: user not found"
 
     @staticmethod
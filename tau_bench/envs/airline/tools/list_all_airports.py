@@ -1,11 +1,13 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
 class ListAllAirports(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any]) -> str:
         airports = [
@@ -52,7 +54,7 @@ class ListAllAirports(Tool):
             "Philadelphia",
             "LaGuardia",
         ]
-        return json.dumps({airport: city for airport, city in zip(airports, cities)})
+        return serializer.dumps({airport: city for airport, city in zip(airports, cities)})
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,8 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
+from tau_bench.envs.airline.indexes import AVAILABILITY_INDEX
 from tau_bench.envs.airline.tools.sort_flights import (
     SORT_ATTRIBUTE_STRING_VALUES,
     sort_flights,
@@ -10,6 +11,8 @@ from tau_bench.envs.tool import Tool
 
 
 class SearchDirectFlight(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(
         data: Dict[str, Any],
@@ -21,7 +24,7 @@ class SearchDirectFlight(Tool):
         output = SearchDirectFlightWithSort.invoke(
             data, origin, destination, date, sort_by
         )
-        return json.dumps(output)
+        return serializer.dumps(output)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -61,16 +64,11 @@ class SearchDirectFlightWithoutSort:
     def invoke(data: Dict[str, Any], origin: str, destination: str, date: str) -> str:
         flights = data["flights"]
         results = []
-        for flight in flights.values():
-            if flight["origin"] == origin and flight["destination"] == destination:
-                if (
-                    date in flight["dates"]
-                    and flight["dates"][date]["status"] == "available"
-                ):
-                    # results add flight except dates, but add flight["datas"][date]
-                    results.append({k: v for k, v in flight.items() if k != "dates"})
-                    results[-1].update(flight["dates"][date])
-                    results[-1]["date"] = date
+        for _, flight in AVAILABILITY_INDEX.find(flights, (origin, destination, date)):
+            # results add flight except dates, but add flight["datas"][date]
+            results.append({k: v for k, v in flight.items() if k != "dates"})
+            results[-1].update(flight["dates"][date])
+            results[-1]["date"] = date
         return results
 
     @staticmethod
@@ -0,0 +1,190 @@
+# Copyright Sierra
+
+import heapq
+import itertools
+from datetime import date as Date, timedelta
+from typing import Any, Dict, List, Tuple
+from tau_bench import serializer
+from tau_bench.envs.airline.indexes import DEPARTURE_INDEX
+from tau_bench.envs.tool import Tool
+
+ITINERARY_SORT_ATTRIBUTES = ["price", "duration"]
+MAX_STOPS = 3
+MAX_LAYOVER_MINUTES = 24 * 60
+
+# a leg is (flight, date, departure, arrival), with times in minutes since midnight of the search date
+Leg = Tuple[Dict[str, Any], str, int, int]
+
+
+def get_minutes(time_est: str) -> int:
+    # "HH:MM:SS", with a "+1" suffix for times on the next day
+    day_offset = 1 if time_est.endswith("+1") else 0
+    hours, minutes, _ = map(int, time_est.replace("+1", "").split(":"))
+    return day_offset * 24 * 60 + hours * 60 + minutes
+
+
+def get_itinerary_cost(legs: List[Leg], sort_by: str) -> int:
+    # neither cost decreases as legs are added, so itineraries come off the heap best first
+    if sort_by == "price":
+        return sum(
+            min(flight["dates"][date]["prices"].values()) for flight, date, _, _ in legs
+        )
+    return legs[-1][3] - legs[0][2]
+
+
+def get_departures(
+    flights: Dict[str, Any], airport: str, start_date: Date, day: int
+) -> List[Leg]:
+    date = (start_date + timedelta(days=day)).isoformat()
+    legs = []
+    for _, flight in DEPARTURE_INDEX.find(flights, (airport, date)):
+        if flight["dates"][date]["status"] != "available":
+            continue
+        midnight = day * 24 * 60
+        departure = midnight + get_minutes(flight["scheduled_departure_time_est"])
+        arrival = midnight + get_minutes(flight["scheduled_arrival_time_est"])
+        legs.append((flight, date, departure, arrival))
+    return legs
+
+
+def search_itineraries(
+    flights: Dict[str, Any],
+    origin: str,
+    destination: str,
+    date: str,
+    max_stops: int,
+    min_layover_minutes: int,
+    sort_by: str,
+    max_results: int,
+) -> List[List[Leg]]:
+    start_date = Date.fromisoformat(date)
+    counter = itertools.count()  # breaks ties in the order itineraries were found
+    heap = []
+    for leg in get_departures(flights, origin, start_date, 0):
+        if max_stops > 0 or leg[0]["destination"] == destination:
+            heapq.heappush(
+                heap, (get_itinerary_cost([leg], sort_by), next(counter), [leg])
+            )
+    results = []
+    while heap and len(results) < max_results:
+        _, _, legs = heapq.heappop(heap)
+        airport = legs[-1][0]["destination"]
+        if airport == destination:
+            results.append(legs)
+            continue
+        visited = {origin} | {flight["destination"] for flight, _, _, _ in legs}
+        is_last_leg = len(legs) == max_stops
+        arrival = legs[-1][3]
+        # connections leave on the day of arrival or, for overnight layovers, the day after
+        for day in (arrival // (24 * 60), arrival // (24 * 60) + 1):
+            for leg in get_departures(flights, airport, start_date, day):
+                next_airport = leg[0]["destination"]
+                if not (
+                    arrival + min_layover_minutes
+                    <= leg[2]
+                    <= arrival + MAX_LAYOVER_MINUTES
+                ):
+                    continue
+                if next_airport in visited:
+                    continue
+                if is_last_leg and next_airport != destination:
+                    continue
+                next_legs = legs + [leg]
+                heapq.heappush(
+                    heap,
+                    (get_itinerary_cost(next_legs, sort_by), next(counter), next_legs),
+                )
+    return results
+
+
+class SearchItineraries(Tool):
+    read_only = True
+
+    @staticmethod
+    def invoke(
+        data: Dict[str, Any],
+        origin: str,
+        destination: str,
+        date: str,
+        max_stops: int = 1,
+        min_layover_minutes: int = 60,
+        sort_by: str = "price",
+        max_results: int = 10,
+    ) -> str:
+        if not 0 <= max_stops <= MAX_STOPS:
+            return f"Error: max_stops must be between 0 and {MAX_STOPS}"
+        if not 0 <= min_layover_minutes <= MAX_LAYOVER_MINUTES:
+            return f"Error: min_layover_minutes must be between 0 and {MAX_LAYOVER_MINUTES}"
+        if max_results < 1:
+            return "Error: max_results must be at least 1"
+        if sort_by not in ITINERARY_SORT_ATTRIBUTES:
+            return f"Error: sort_by must be one of {ITINERARY_SORT_ATTRIBUTES}"
+        itineraries = search_itineraries(
+            data["flights"],
+            origin,
+            destination,
+            date,
+            max_stops,
+            min_layover_minutes,
+            sort_by,
+            max_results,
+        )
+        results = []
+        for legs in itineraries:
+            segments = []
+            for flight, date, _, _ in legs:
+                segment = {k: v for k, v in flight.items() if k != "dates"}
+                segment.update(flight["dates"][date])
+                segment["date"] = date
+                segments.append(segment)
+            results.append(segments)
+        return serializer.dumps(results)
+
+    @staticmethod
+    def get_info() -> Dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": "search_itineraries",
+                "description": (
+                    "Search itineraries with up to a number of connections between two cities, departing on a "
+                    "specific date. Each itinerary is a list of flights, and the best itineraries by total price "
+                    "(cheapest cabin of each flight) or total duration including layovers come first."
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "origin": {
+                            "type": "string",
+                            "description": "The origin city airport in three letters, such as 'JFK'.",
+                        },
+                        "destination": {
+                            "type": "string",
+                            "description": "The destination city airport in three letters, such as 'LAX'.",
+                        },
+                        "date": {
+                            "type": "string",
+                            "description": "The departure date of the first flight in the format 'YYYY-MM-DD', such as '2024-05-01'.",
+                        },
+                        "max_stops": {
+                            "type": "integer",
+                            "description": f"The maximum number of connections, from 0 (direct flights only) to {MAX_STOPS}. The default is 1.",
+                        },
+                        "min_layover_minutes": {
+                            "type": "integer",
+                            "description": "The minimum time between a flight's arrival and the next flight's departure, in minutes. The default is 60.",
+                        },
+                        "sort_by": {
+                            "type": "string",
+                            "enum": ITINERARY_SORT_ATTRIBUTES,
+                            "description": "Whether the best itineraries are the cheapest or the shortest. The default is 'price'.",
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "The maximum number of itineraries to return. The default is 10.",
+                        },
+                    },
+                    "required": ["origin", "destination", "date"],
+                },
+            },
+        }
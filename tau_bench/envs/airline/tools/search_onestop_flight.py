@@ -1,7 +1,8 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
+from tau_bench.envs.airline.indexes import DEPARTURE_INDEX, ROUTE_INDEX
 from tau_bench.envs.airline.tools.sort_flights import (
     SORT_ATTRIBUTE_STRING_VALUES,
     sort_flights,
@@ -10,6 +11,8 @@ from tau_bench.envs.tool import Tool
 
 
 class SearchOnestopFlight(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(
         data: Dict[str, Any],
@@ -21,7 +24,7 @@ class SearchOnestopFlight(Tool):
         output = SearchOnestopFlightWithSort.invoke(
             data, origin, destination, date, sort_by
         )
-        return json.dumps(output)
+        return serializer.dumps(output)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -61,39 +64,33 @@ class SearchOnestopFlightWithoutSort:
     def invoke(data: Dict[str, Any], origin: str, destination: str, date: str) -> str:
         flights = data["flights"]
         results = []
-        for flight1 in flights.values():
-            if flight1["origin"] == origin:
-                for flight2 in flights.values():
+        # only flights leaving the origin that day, joined with the flights from their destination
+        for _, flight1 in DEPARTURE_INDEX.find(flights, (origin, date)):
+            for _, flight2 in ROUTE_INDEX.find(
+                flights, (flight1["destination"], destination)
+            ):
+                date2 = (
+                    f"2024-05-{int(date[-2:])+1}"
+                    if "+1" in flight1["scheduled_arrival_time_est"]
+                    else date
+                )
+                if (
+                    flight1["scheduled_arrival_time_est"]
+                    > flight2["scheduled_departure_time_est"]
+                ):
+                    continue
+                if date in flight1["dates"] and date2 in flight2["dates"]:
                     if (
-                        flight2["destination"] == destination
-                        and flight1["destination"] == flight2["origin"]
+                        flight1["dates"][date]["status"] == "available"
+                        and flight2["dates"][date2]["status"] == "available"
                     ):
-                        date2 = (
-                            f"2024-05-{int(date[-2:])+1}"
-                            if "+1" in flight1["scheduled_arrival_time_est"]
-                            else date
-                        )
-                        if (
-                            flight1["scheduled_arrival_time_est"]
-                            > flight2["scheduled_departure_time_est"]
-                        ):
-                            continue
-                        if date in flight1["dates"] and date2 in flight2["dates"]:
-                            if (
-                                flight1["dates"][date]["status"] == "available"
-                                and flight2["dates"][date2]["status"] == "available"
-                            ):
-                                result1 = {
-                                    k: v for k, v in flight1.items() if k != "dates"
-                                }
-                                result1.update(flight1["dates"][date])
-                                result1["date"] = date
-                                result2 = {
-                                    k: v for k, v in flight2.items() if k != "dates"
-                                }
-                                result2.update(flight2["dates"][date])
-                                result2["date"] = date2
-                                results.append([result1, result2])
+                        result1 = {k: v for k, v in flight1.items() if k != "dates"}
+                        result1.update(flight1["dates"][date])
+                        result1["date"] = date
+                        result2 = {k: v for k, v in flight2.items() if k != "dates"}
+                        result2.update(flight2["dates"][date])
+                        result2["date"] = date2
+                        results.append([result1, result2])
         return results
 
     @staticmethod
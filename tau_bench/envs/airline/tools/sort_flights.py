@@ -1,8 +1,11 @@
 from pydantic import BaseModel, Field
 from enum import StrEnum
-from typing import List, Union, Any, Dict
+from functools import lru_cache
+from typing import List, Union, Any, Dict, Tuple
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
-import json
+import re
+import numpy as np
 
 
 class SortAttribute(StrEnum):
@@ -159,13 +162,74 @@ def get_sort_value(flight_trip: FlightTrip, sort_by: SortAttribute):
                 raise ValueError(f"Invalid sort attribute: {sort_by}")
 
 
-def sort_flights(flight_trips, sort_by: SortAttribute):
-    return sorted(
-        flight_trips,
-        key=lambda x: get_sort_value(x, sort_by),
+TIME_PATTERN = re.compile(r"^(\d\d):(\d\d):(\d\d)(\+1)?$")
+
+# the cabins whose cheapest price is the sort value
+SORT_ATTRIBUTE_TO_CABINS = {
+    SortAttribute.PRICE: ["basic_economy", "economy", "business"],
+    SortAttribute.PRICE_BASIC_ECONOMY: ["basic_economy"],
+    SortAttribute.PRICE_ECONOMY: ["economy"],
+    SortAttribute.PRICE_BUSINESS: ["business"],
+}
+
+
+# bounded, since agents can pass in any number of distinct strings
+@lru_cache(maxsize=4096)
+def parse_time(time_str: str) -> Tuple[int, int]:
+    """Returns the seconds since midnight of the departure day (as in time_difference_seconds),
+    and a rank that orders times the same way as comparing the strings."""
+    match = TIME_PATTERN.match(time_str)
+    if match is None:
+        raise ValueError(f"Invalid time: {time_str}")
+    hours, minutes, seconds = (int(match.group(i)) for i in range(1, 4))
+    next_day = 1 if match.group(4) else 0
+    return (
+        next_day * 86400 + hours * 3600 + minutes * 60 + seconds,
+        (hours * 10000 + minutes * 100 + seconds) * 2 + next_day,
     )
 
 
+def get_sort_key(flight_trip: FlightTrip, sort_by: SortAttribute) -> Union[int, float]:
+    # a number that orders trips the same way as get_sort_value
+    segments = flight_trip if type(flight_trip) is list else [flight_trip]
+    cabins = SORT_ATTRIBUTE_TO_CABINS.get(sort_by)
+    if cabins is not None:
+        # sum() starts from 0, so prices that aren't numbers raise instead of comparing as strings
+        return sum(
+            min(segment["prices"][cabin] for cabin in cabins) for segment in segments
+        )
+    departures = [parse_time(s["scheduled_departure_time_est"]) for s in segments]
+    arrivals = [parse_time(s["scheduled_arrival_time_est"]) for s in segments]
+    if sort_by == SortAttribute.TOTAL_FLIGHT_DURATION_EXCL_LAYOVER:
+        return sum(a[0] - d[0] for a, d in zip(arrivals, departures))
+    ranks = [departure[1] for departure in departures]
+    # the first and last segments once sorted by departure, with ties in their original order
+    first = ranks.index(min(ranks))
+    last = len(ranks) - 1 - ranks[::-1].index(max(ranks))
+    if sort_by == SortAttribute.DEPARTURE_TIME:
+        return departures[first][1]
+    elif sort_by == SortAttribute.ARRIVAL_TIME:
+        return arrivals[last][1]
+    elif sort_by == SortAttribute.TOTAL_FLIGHT_DURATION_INCL_LAYOVER:
+        return arrivals[last][0] - departures[first][0]
+    raise ValueError(f"Invalid sort attribute: {sort_by}")
+
+
+def sort_flights(flight_trips, sort_by: SortAttribute):
+    if not flight_trips:
+        return list(flight_trips)
+    try:
+        sort_by = SortAttribute(sort_by)
+        keys = np.array([get_sort_key(trip, sort_by) for trip in flight_trips])
+    except (KeyError, TypeError, ValueError):
+        # malformed trips, which the generic sort handles or reports errors for the same way as before
+        return sorted(
+            flight_trips,
+            key=lambda x: get_sort_value(x, sort_by),
+        )
+    return [flight_trips[i] for i in np.argsort(keys, kind="stable")]
+
+
 class SortFlightToolSchema(BaseModel):
     flight_trips: List[FlightTrip] = Field(
         description='flights to sort. A single "flight" can be either a single FlightSegment or a list of FlightSegments.'
@@ -178,6 +242,8 @@ sort_flight_tool_json_schema.pop("title")
 
 
 class SortFlights(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(
         data: Dict[str, Any],
@@ -185,7 +251,7 @@ class SortFlights(Tool):
         sort_by: SortAttribute,
     ) -> str:
         sorted_flights = sort_flights(flight_trips, sort_by)
-        return json.dumps(sorted_flights)
+        return serializer.dumps(sorted_flights)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict, Optional
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -52,7 +52,7 @@ class UpdateReservationBaggages(Tool):
                 }
             )
 
-        return json.dumps(reservation)
+        return serializer.dumps(reservation)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,8 +1,8 @@
 # Copyright Sierra
 
-import json
 from copy import deepcopy
 from typing import Any, Dict, List
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -87,7 +87,7 @@ class UpdateReservationFlights(Tool):
         reservation["cabin"] = cabin  # cabin needs to be updated
 
         # do not make flight database update here, assume it takes time to be updated
-        return json.dumps(reservation)
+        return serializer.dumps(reservation)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict, List
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -19,7 +19,7 @@ class UpdateReservationPassengers(Tool):
         if len(passengers) != len(reservation["passengers"]):
             return "Error: number of passengers does not match"
         reservation["passengers"] = passengers
-        return json.dumps(reservation)
+        return serializer.dumps(reservation)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
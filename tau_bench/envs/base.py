@@ -1,9 +1,20 @@
 # Copyright Sierra
 
+import asyncio
+import itertools
+import json
 import random
-from hashlib import sha256
+from concurrent.futures import Executor, Future
+from tau_bench.envs.db import (
+    DATA_HASH_SCHEME,
+    Journal,
+    copy_on_write,
+    hash_data,
+    load_baseline,
+)
+from tau_bench.envs.gt_data_hashes import get_actions_key
 from tau_bench.envs.tool import Tool
-from typing import Any, Callable, Dict, List, Type, Optional, Set, Union, Tuple
+from typing import Any, Callable, Dict, List, Type, Optional, Union, Tuple
 
 from tau_bench.envs.user import load_user, UserStrategy
 from tau_bench.types import (
@@ -18,28 +29,6 @@ from tau_bench.types import (
     RESPOND_ACTION_NAME,
 )
 
-ToHashable = Union[
-    str, int, float, Dict[str, "ToHashable"], List["ToHashable"], Set["ToHashable"]
-]
-Hashable = Union[str, int, float, Tuple["Hashable"], Tuple[Tuple[str, "Hashable"]]]
-
-
-def to_hashable(item: ToHashable) -> Hashable:
-    if isinstance(item, dict):
-        return tuple((key, to_hashable(value)) for key, value in sorted(item.items()))
-    elif isinstance(item, list):
-        return tuple(to_hashable(element) for element in item)
-    elif isinstance(item, set):
-        return tuple(sorted(to_hashable(element) for element in item))
-    else:
-        return item
-
-
-def consistent_hash(
-    value: Hashable,
-) -> str:
-    return sha256(str(value).encode("utf-8")).hexdigest()
-
 
 class Env(object):
     def __init__(
@@ -53,14 +42,27 @@ class Env(object):
         user_model: str,
         user_provider: Optional[str] = None,
         task_index: Optional[int] = None,
+        gt_data_hashes: Optional[Dict[str, str]] = None,
     ) -> None:
         super().__init__()
         self.data_load_func = data_load_func
-        self.data = data_load_func()
+        # the parsed baseline is shared by the process; each env only copies the records it touches
+        self.journal = Journal()
+        self.data = copy_on_write(load_baseline(data_load_func), journal=self.journal)
+        self.initial_checkpoint = self.checkpoint()
+        # 0 while self.data is the untouched baseline, and a number never used before after every
+        # write, so cached results of read-only tools are reused until a write tool runs
+        self.data_versions = itertools.count(1)
+        self.data_version = 0
+        self.tool_cache: Dict[Tuple[str, str, int], str] = {}
         self.tools_map: Dict[str, Type[Tool]] = {
             tool.get_info()["function"]["name"]: tool for tool in tools
         }
         self.tools_info = [tool.get_info() for tool in tools]
+        # malformed tool calls are rejected before the tool touches the data
+        self.tool_validators = {
+            name: tool.get_validator() for name, tool in self.tools_map.items()
+        }
         self.terminate_tools = []
         self.tasks = tasks
         if task_index is not None:
@@ -74,43 +76,106 @@ class Env(object):
             user_strategy=user_strategy, model=user_model, provider=user_provider
         )
         self.actions: List[Action] = []
+        self.gt_data_hashes = gt_data_hashes or {}
+        # when set, the ground truth of a finished episode is computed in this executor and
+        # the reward is left in `pending_reward` for the caller to resolve
+        self.reward_executor: Optional[Executor] = None
+        self.pending_reward: Optional["Future[RewardResult]"] = None
+        # when set, infos reference the task by task_id instead of carrying the whole task,
+        # so agents don't serialize it again on every step
+        self.lean_info = False
 
-    def reset(self, task_index: Optional[int] = None) -> EnvResetResponse:
-        if task_index is None:
-            task_index = random.randint(0, len(self.tasks))
+    def checkpoint(self) -> int:
+        return self.journal.checkpoint()
+
+    def rollback(self, checkpoint: int) -> None:
+        # undoes every write made to self.data since the checkpoint
+        self.journal.rollback(checkpoint)
+        if checkpoint == self.initial_checkpoint:
+            # back at the baseline, where results cached for earlier tasks and trials still hold
+            self.data_version = 0
+        else:
+            self.bump_data_version()
+
+    def bump_data_version(self) -> None:
+        # must be called after writing to self.data outside of invoke_tool
+        self.data_version = next(self.data_versions)
+        self.tool_cache = {
+            key: observation
+            for key, observation in self.tool_cache.items()
+            if key[2] == 0
+        }
+
+    def set_task(self, task_index: int) -> None:
+        # puts the env back in its initial state for the task without talking to the user
         self.task_index = task_index
-        self.data = self.data_load_func()
+        self.rollback(self.initial_checkpoint)
         self.task = self.tasks[task_index]
         self.actions = []
+        self.pending_reward = None
+
+    def reset(self, task_index: Optional[int] = None) -> EnvResetResponse:
+        if task_index is None:
+            task_index = random.randint(0, len(self.tasks))
+        self.set_task(task_index)
         initial_observation = self.user.reset(instruction=self.task.instruction)
         return EnvResetResponse(
-            observation=initial_observation, info=EnvInfo(task=self.task, source="user")
+            observation=initial_observation, info=self.make_info(source="user")
         )
 
+    async def areset(self, task_index: Optional[int] = None) -> EnvResetResponse:
+        if task_index is None:
+            task_index = random.randint(0, len(self.tasks))
+        self.set_task(task_index)
+        initial_observation = await self.user.areset(instruction=self.task.instruction)
+        return EnvResetResponse(
+            observation=initial_observation, info=self.make_info(source="user")
+        )
+
+    async def astep(self, action: Action) -> EnvResponse:
+        # the tool call and the reward, which replays the ground truth actions, run in a
+        # thread so that they don't hold up the other episodes in the event loop
+        observation = None
+        if action.name == RESPOND_ACTION_NAME:
+            observation = await self.user.astep(action.kwargs["content"])
+        return await asyncio.to_thread(self.step, action, observation=observation)
+
+    def make_info(self, source: Optional[str] = None) -> EnvInfo:
+        if self.lean_info:
+            return EnvInfo(task_id=self.task_index, source=source)
+        return EnvInfo(task=self.task, task_id=self.task_index, source=source)
+
+    def get_info_task(self, info: Union[EnvInfo, Dict[str, Any]]) -> Task:
+        """The task of a step info, or of a result's info, whether or not it is lean."""
+        if isinstance(info, EnvInfo):
+            info = info.model_dump()
+        if info.get("task") is not None:
+            return Task(**info["task"])
+        return self.tasks[info["task_id"]]
+
     def step(
         self,
         action: Action,
         can_do_user_step: bool = True,
         can_do_tool_execution: bool = True,
+        observation: Optional[str] = None,
     ) -> EnvResponse:
+        # observation is the result of the action if it already ran elsewhere, e.g. the
+        # user's reply in astep
         self.actions.append(action)
 
-        info = EnvInfo(task=self.task)
+        info = self.make_info()
         reward = 0
         done = False
         if action.name == RESPOND_ACTION_NAME and can_do_user_step:
-            observation = self.user.step(action.kwargs["content"])
+            if observation is None:
+                observation = self.user.step(action.kwargs["content"])
             info.source = "user"
             done = "###STOP###" in observation
         elif action.name in self.tools_map:
-            if can_do_tool_execution:
-                try:
-                    observation = self.tools_map[action.name].invoke(
-                        data=self.data, **action.kwargs
-                    )
-                except Exception as e:
-                    observation = f"Error: {e}"
-            else:
+            if observation is None and can_do_tool_execution:
+                observation = self.invoke_tool(action)
+            elif observation is None:
                 observation = f"Unknown action {action.name}"
             info.source = action.name
             if action.name in self.terminate_tools:
@@ -120,53 +185,166 @@ class Env(object):
             info.source = action.name
 
         if done:
-            reward_res = self.calculate_reward()
-            reward = reward_res.reward
-            info.reward_info = reward_res
+            if self.reward_executor is not None:
+                self.pending_reward = self.submit_reward(self.reward_executor)
+            else:
+                reward_res = self.calculate_reward()
+                reward = reward_res.reward
+                info.reward_info = reward_res
             info.user_cost = self.user.get_total_cost()
         return EnvResponse(observation=observation, reward=reward, done=done, info=info)
 
+    def step_tool_calls(self, actions: List[Action]) -> List[EnvResponse]:
+        """Steps through the tool calls of one assistant message, in order.
+
+        Stops after an action that ends the episode, so the responses may be fewer than
+        the actions.
+        """
+        responses = []
+        for action in actions:
+            response = self.step(action)
+            responses.append(response)
+            if response.done:
+                break
+        return responses
+
+    async def astep_tool_calls(self, actions: List[Action]) -> List[EnvResponse]:
+        responses = []
+        for action in actions:
+            response = await self.astep(action)
+            responses.append(response)
+            if response.done:
+                break
+        return responses
+
+    def invoke_tool(self, action: Action) -> str:
+        tool = self.tools_map[action.name]
+        cache_key = None
+        if tool.read_only:
+            try:
+                cache_key = (
+                    action.name,
+                    json.dumps(action.kwargs, sort_keys=True),
+                    self.data_version,
+                )
+            except TypeError:
+                pass
+            if cache_key in self.tool_cache:
+                return self.tool_cache[cache_key]
+        error = self.tool_validators[action.name](action.kwargs)
+        if error is not None:
+            return f"Error: {error}"
+        try:
+            observation = tool.invoke(data=self.data, **action.kwargs)
+        except Exception as e:
+            observation = f"Error: {e}"
+        if not tool.read_only:
+            self.bump_data_version()
+        elif cache_key is not None:
+            self.tool_cache[cache_key] = observation
+        return observation
+
     def get_data_hash(self) -> str:
-        return consistent_hash(to_hashable(self.data))
+        return hash_data(self.data)
 
-    def calculate_reward(self) -> RewardResult:
-        data_hash = self.get_data_hash()
-        reward = 1.0
-        actions = [
-            action for action in self.task.actions if action.name != RESPOND_ACTION_NAME
-        ]
-
-        # Check if the database changes are correct. If they are not correct, then we set the reward to 0.
-        # TODO: cache gt_data_hash in tasks.py (low priority)
-        self.data = self.data_load_func()
+    def compute_gt_data_hash(self) -> str:
+        self.rollback(self.initial_checkpoint)
         for action in self.task.actions:
             if action.name not in self.terminate_tools:
                 self.step(action)
-        gt_data_hash = self.get_data_hash()
-        info = RewardActionInfo(
-            r_actions=data_hash == gt_data_hash, gt_data_hash=gt_data_hash
-        )
-        if not info.r_actions:
-            reward = 0.0
-
-        if len(self.task.outputs) > 0:
-            # check outputs
-            r_outputs = 1.0
-            outputs = {}
-            for output in self.task.outputs:
-                found = False
-                for action in self.actions:
-                    if (
-                        action.name == RESPOND_ACTION_NAME
-                        and output.lower()
-                        in action.kwargs["content"].lower().replace(",", "")
-                    ):
-                        found = True
-                        break
-                outputs[output] = found
-                if not found:
-                    r_outputs = 0.0
-                    reward = 0.0
-            info = RewardOutputInfo(r_outputs=r_outputs, outputs=outputs)
-
-        return RewardResult(reward=reward, info=info, actions=actions)
+        return self.get_data_hash()
+
+    def calculate_reward(self) -> RewardResult:
+        data_hash = self.get_data_hash()
+        gt_data_hash = self.gt_data_hashes.get(get_actions_key(self.task.actions))
+        if gt_data_hash is None:
+            gt_data_hash = self.compute_gt_data_hash()
+        return grade(self.task, self.actions, data_hash, gt_data_hash)
+
+    def submit_reward(self, executor: Executor) -> "Future[RewardResult]":
+        # everything read from the env is captured now, so it can be reused before the future resolves
+        task, actions, data_hash = self.task, list(self.actions), self.get_data_hash()
+        gt_data_hash = self.gt_data_hashes.get(get_actions_key(task.actions))
+        reward_future: "Future[RewardResult]" = Future()
+        if gt_data_hash is not None:
+            reward_future.set_result(grade(task, actions, data_hash, gt_data_hash))
+            return reward_future
+
+        def _grade(gt_future: "Future[str]") -> None:
+            try:
+                reward_future.set_result(
+                    grade(task, actions, data_hash, gt_future.result())
+                )
+            except Exception as e:
+                reward_future.set_exception(e)
+
+        executor.submit(
+            replay_gt_data_hash,
+            self.data_load_func,
+            self.tools_map,
+            self.terminate_tools,
+            task.actions,
+        ).add_done_callback(_grade)
+        return reward_future
+
+
+def replay_gt_data_hash(
+    data_load_func: Callable[[], Dict[str, Any]],
+    tools_map: Dict[str, Type[Tool]],
+    terminate_tools: List[str],
+    actions: List[Action],
+) -> str:
+    """Same as `Env.compute_gt_data_hash`, without an env, so that it can run in another process."""
+    data = copy_on_write(load_baseline(data_load_func))
+    for action in actions:
+        if action.name in tools_map and action.name not in terminate_tools:
+            if tools_map[action.name].get_validator()(action.kwargs) is not None:
+                continue
+            try:
+                tools_map[action.name].invoke(data=data, **action.kwargs)
+            except Exception:
+                pass
+    return hash_data(data)
+
+
+def grade(
+    task: Task, actions: List[Action], data_hash: str, gt_data_hash: str
+) -> RewardResult:
+    reward = 1.0
+    key_actions = [
+        action for action in task.actions if action.name != RESPOND_ACTION_NAME
+    ]
+
+    # Check if the database changes are correct. If they are not correct, then we set the reward to 0.
+    info = RewardActionInfo(
+        r_actions=data_hash == gt_data_hash, gt_data_hash=gt_data_hash
+    )
+    if not info.r_actions:
+        reward = 0.0
+
+    if len(task.outputs) > 0:
+        # check outputs
+        r_outputs = 1.0
+        outputs = {}
+        for output in task.outputs:
+            found = False
+            for action in actions:
+                if (
+                    action.name == RESPOND_ACTION_NAME
+                    and output.lower()
+                    in action.kwargs["content"].lower().replace(",", "")
+                ):
+                    found = True
+                    break
+            outputs[output] = found
+            if not found:
+                r_outputs = 0.0
+                reward = 0.0
+        info = RewardOutputInfo(r_outputs=r_outputs, outputs=outputs)
+
+    return RewardResult(
+        reward=reward,
+        info=info,
+        actions=key_actions,
+        data_hash_scheme=DATA_HASH_SCHEME,
+    )
@@ -0,0 +1,366 @@
+# Copyright Sierra
+
+import os
+import threading
+import zlib
+from collections import defaultdict
+from collections.abc import Mapping, MutableMapping
+from hashlib import sha256
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+Baseline = Dict[str, Mapping[str, Any]]
+
+ToHashable = Union[
+    str, int, float, Dict[str, "ToHashable"], List["ToHashable"], Set["ToHashable"]
+]
+Hashable = Union[str, int, float, Tuple["Hashable"], Tuple[Tuple[str, "Hashable"]]]
+
+# changes whenever `hash_data` would produce different hashes for the same data
+DATA_HASH_SCHEME = "merkle-64"
+NUM_HASH_BUCKETS = 64
+
+_BASELINES: Dict[Callable[[], Baseline], Baseline] = {}
+_BASELINES_LOCK = threading.Lock()
+
+
+def load_baseline(data_load_func: Callable[[], Baseline]) -> Baseline:
+    """Returns the parsed database for `data_load_func`, loading it once per process.
+
+    The baseline is shared by every environment in the process and must never be
+    mutated; use `copy_on_write` to get a mutable per-episode view of it.
+    """
+    baseline = _BASELINES.get(data_load_func)
+    if baseline is None:
+        with _BASELINES_LOCK:
+            baseline = _BASELINES.get(data_load_func)
+            if baseline is None:
+                baseline = data_load_func()
+                _BASELINES[data_load_func] = baseline
+    return baseline
+
+
+def copy_record(value: Any) -> Any:
+    # faster than copy.deepcopy for the JSON-like values stored in the databases
+    if isinstance(value, dict):
+        return {k: copy_record(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [copy_record(v) for v in value]
+    return value
+
+
+_MISSING = object()
+
+
+class Journal(object):
+    """Undo log shared by the tables of a copy-on-write view.
+
+    Once a checkpoint is taken, the first time a record is looked up, written or
+    deleted after it, the table journals the state the record had before, so that
+    `rollback` only undoes the records touched since the checkpoint. Tools must look
+    records up again after a checkpoint instead of holding on to earlier references.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[Tuple["CowTable", str, Any, bool]] = []
+        # bumped on every checkpoint and rollback so that tables journal each key again
+        self.epoch = 0
+
+    def checkpoint(self) -> int:
+        self.epoch += 1
+        return len(self.entries)
+
+    def rollback(self, checkpoint: int) -> None:
+        while len(self.entries) > checkpoint:
+            table, key, record, deleted = self.entries.pop()
+            if record is _MISSING:
+                table.local.pop(key, None)
+            else:
+                table.local[key] = record
+            if deleted:
+                table.deleted.add(key)
+            else:
+                table.deleted.discard(key)
+        self.epoch += 1
+
+
+class CowTable(MutableMapping):
+    """A mutable view of a baseline table that copies a record the first time it is looked up.
+
+    Tools mutate records in place after looking them up by key (e.g. `orders[order_id]`),
+    so a record is copied into `local` on first lookup and every later lookup returns
+    that copy. Iterating with `values()`/`items()` does not copy: untouched records are
+    yielded straight from the baseline and must be treated as read-only.
+    """
+
+    def __init__(
+        self, base: Mapping[str, Any], journal: Optional[Journal] = None
+    ) -> None:
+        self.base = base
+        self.local: Dict[str, Any] = {}
+        self.deleted: Set[str] = set()
+        self.journal = journal
+        self.journaled: Dict[str, int] = {}
+
+    def _journal(self, key: str) -> None:
+        journal = self.journal
+        if journal is None or journal.epoch == 0:
+            return
+        if self.journaled.get(key) == journal.epoch:
+            return
+        self.journaled[key] = journal.epoch
+        record = copy_record(self.local[key]) if key in self.local else _MISSING
+        journal.entries.append((self, key, record, key in self.deleted))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.local:
+            self._journal(key)
+            return self.local[key]
+        if key in self.deleted or key not in self.base:
+            raise KeyError(key)
+        self._journal(key)
+        record = copy_record(self.base[key])
+        self.local[key] = record
+        return record
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._journal(key)
+        self.local[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._journal(key)
+        self.local.pop(key, None)
+        if key in self.base:
+            self.deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.local or (key in self.base and key not in self.deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self.deleted:
+                yield key
+        for key in self.local:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return (
+            len(self.base)
+            - len(self.deleted)
+            + sum(1 for key in self.local if key not in self.base)
+        )
+
+    def _peek(self, key: str) -> Any:
+        return self.local[key] if key in self.local else self.base[key]
+
+    def values(self) -> List[Any]:
+        return [self._peek(key) for key in self]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self._peek(key)) for key in self]
+
+
+def copy_on_write(
+    baseline: Baseline, journal: Optional[Journal] = None
+) -> Dict[str, CowTable]:
+    return {name: CowTable(table, journal=journal) for name, table in baseline.items()}
+
+
+def to_hashable(item: ToHashable) -> Hashable:
+    if isinstance(item, Mapping):
+        return tuple((key, to_hashable(value)) for key, value in sorted(item.items()))
+    elif isinstance(item, list):
+        return tuple(to_hashable(element) for element in item)
+    elif isinstance(item, set):
+        return tuple(sorted(to_hashable(element) for element in item))
+    else:
+        return item
+
+
+def consistent_hash(
+    value: Hashable,
+) -> str:
+    return sha256(str(value).encode("utf-8")).hexdigest()
+
+
+def hash_record(key: str, record: Any) -> bytes:
+    return sha256(str((key, to_hashable(record))).encode("utf-8")).digest()
+
+
+def get_hash_bucket(key: str) -> int:
+    # crc32 rather than hash() since the latter is salted per process
+    return zlib.crc32(key.encode("utf-8")) % NUM_HASH_BUCKETS
+
+
+def hash_bucket(leaves: List[bytes]) -> bytes:
+    return sha256(b"".join(leaves)).digest()
+
+
+class HashTree(object):
+    """A two-level Merkle tree over a table: records are hashed into buckets by key and
+    the bucket hashes are hashed into the root."""
+
+    def __init__(self, table: Mapping) -> None:
+        self.leaves: Dict[str, bytes] = {}
+        self.bucket_keys: List[List[str]] = [[] for _ in range(NUM_HASH_BUCKETS)]
+        for key, record in table.items():
+            self.leaves[key] = hash_record(key, record)
+            self.bucket_keys[get_hash_bucket(key)].append(key)
+        for keys in self.bucket_keys:
+            keys.sort()
+        self.buckets = [
+            hash_bucket([self.leaves[key] for key in keys]) for keys in self.bucket_keys
+        ]
+        self.root = hash_bucket(self.buckets)
+
+
+_HASH_TREES: Dict[int, Tuple[Mapping[str, Any], HashTree]] = {}
+_HASH_TREES_LOCK = threading.Lock()
+
+
+def get_baseline_hash_tree(table: Mapping[str, Any]) -> HashTree:
+    # baseline tables are immutable, so their trees are built once per process
+    entry = _HASH_TREES.get(id(table))
+    if entry is None:
+        with _HASH_TREES_LOCK:
+            entry = _HASH_TREES.get(id(table))
+            if entry is None:
+                # keep a reference to the table so that its id is never reused
+                entry = (table, HashTree(table))
+                _HASH_TREES[id(table)] = entry
+    return entry[1]
+
+
+_INDEXES: Dict[Tuple[int, Callable[[Mapping[str, Any]], Any]], Tuple[Mapping[str, Any], Any]] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_baseline_index(
+    table: Mapping[str, Any], build_index: Callable[[Mapping[str, Any]], Any]
+) -> Any:
+    """Returns `build_index(table)` for a baseline table, built once per process.
+
+    The index only reflects the baseline; callers check the records a `CowTable` has
+    copied or deleted during the episode themselves.
+    """
+    entry = _INDEXES.get((id(table), build_index))
+    if entry is None:
+        with _INDEXES_LOCK:
+            entry = _INDEXES.get((id(table), build_index))
+            if entry is None:
+                entry = (table, build_index(table))
+                _INDEXES[(id(table), build_index)] = entry
+    return entry[1]
+
+
+def get_positions(table: Mapping[str, Any]) -> Dict[str, int]:
+    return {key: i for i, key in enumerate(table)}
+
+
+class TableIndex(object):
+    """Finds the records of a table by keys derived from each record, without scanning the table.
+
+    The index over a baseline table is built once per process; records that a `CowTable`
+    copied or deleted during the episode are checked against their current state instead.
+    """
+
+    def __init__(self, get_keys: Callable[[Any], Iterable[Any]]) -> None:
+        self.get_keys = get_keys
+
+    def build(self, table: Mapping[str, Any]) -> Dict[Any, List[str]]:
+        index = defaultdict(list)
+        for key, record in table.items():
+            for index_key in self.get_keys(record):
+                index[index_key].append(key)
+        return dict(index)
+
+    def find(self, table: Mapping[str, Any], index_key: Any) -> List[Tuple[str, Any]]:
+        """Returns the records with `index_key` in table order. They are not copied and must be treated as read-only."""
+        if not isinstance(table, CowTable):
+            return [
+                (key, record)
+                for key, record in table.items()
+                if index_key in self.get_keys(record)
+            ]
+        records = [
+            (key, table.base[key])
+            for key in get_baseline_index(table.base, self.build).get(index_key, [])
+            if key not in table.local and key not in table.deleted
+        ]
+        touched = [
+            (key, record)
+            for key, record in table.local.items()
+            if index_key in self.get_keys(record)
+        ]
+        if touched:
+            positions = get_baseline_index(table.base, get_positions)
+            records.extend(touched)
+            records.sort(key=lambda item: positions.get(item[0], len(positions)))
+        return records
+
+
+
+def hash_cow_table(table: CowTable) -> bytes:
+    # only the buckets holding records touched during the episode are rehashed
+    tree = get_baseline_hash_tree(table.base)
+    touched: Dict[int, Dict[str, Any]] = {}
+    for key, record in table.local.items():
+        touched.setdefault(get_hash_bucket(key), {})[key] = record
+    for key in table.deleted:
+        touched.setdefault(get_hash_bucket(key), {})
+    if not touched:
+        return tree.root
+    buckets = list(tree.buckets)
+    for bucket, records in touched.items():
+        keys = [
+            key
+            for key in tree.bucket_keys[bucket]
+            if key not in table.deleted and key not in records
+        ]
+        keys.extend(records.keys())
+        keys.sort()
+        buckets[bucket] = hash_bucket(
+            [
+                hash_record(key, records[key]) if key in records else tree.leaves[key]
+                for key in keys
+            ]
+        )
+    return hash_bucket(buckets)
+
+
+def hash_data(data: Mapping[str, Any]) -> str:
+    digest = sha256()
+    for name in sorted(data.keys()):
+        table = data[name]
+        if isinstance(table, CowTable):
+            root = hash_cow_table(table)
+        elif isinstance(table, Mapping):
+            root = HashTree(table).root
+        else:
+            root = sha256(str(to_hashable(table)).encode("utf-8")).digest()
+        digest.update(name.encode("utf-8"))
+        digest.update(root)
+    return digest.hexdigest()
+
+
+def fingerprint_files(paths: List[str]) -> str:
+    digest = sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(sha256(f.read()).digest())
+    return digest.hexdigest()
@@ -0,0 +1,82 @@
+# Copyright Sierra
+
+"""Ground truth data hashes of every task, precomputed so that rewards skip the replay.
+
+Rebuild after changing the data files or the behavior of a write tool:
+
+    python build_gt_data_hashes.py --env retail airline
+"""
+
+import importlib
+import json
+import os
+from functools import lru_cache
+from hashlib import sha256
+from typing import Dict, List
+
+from tau_bench.envs.db import DATA_HASH_SCHEME
+from tau_bench.types import Action
+
+GT_DATA_HASHES_FILE_NAME = "gt_data_hashes.json"
+
+ENV_TASK_SPLITS = {
+    "retail": ["test", "dev", "train"],
+    "airline": ["test", "revised_test"],
+}
+
+
+def get_actions_key(actions: List[Action]) -> str:
+    # keyed by the actions rather than the task index so that tasks shared across splits resolve to one entry
+    return sha256(
+        json.dumps([action.model_dump() for action in actions], sort_keys=True).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def load_gt_data_hashes(folder_path: str, fingerprint: str) -> Dict[str, str]:
+    path = os.path.join(folder_path, GT_DATA_HASHES_FILE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        store = json.load(f)
+    if (
+        store["fingerprint"] != fingerprint
+        or store.get("data_hash_scheme") != DATA_HASH_SCHEME
+    ):
+        # the data files or the hash function changed since the store was built
+        return {}
+    return store["gt_data_hashes"]
+
+
+def build_gt_data_hashes(env_name: str) -> str:
+    from tau_bench.envs import get_env
+
+    data_module = importlib.import_module(f"tau_bench.envs.{env_name}.data")
+    gt_data_hashes: Dict[str, str] = {}
+    for task_split in ENV_TASK_SPLITS[env_name]:
+        # the ground truth replay never talks to the user, so no user model is needed
+        env = get_env(
+            env_name,
+            user_strategy="human",
+            user_model="gpt-4o",
+            task_split=task_split,
+            task_index=0,
+        )
+        for task in env.tasks:
+            env.task = task
+            gt_data_hashes[get_actions_key(task.actions)] = env.compute_gt_data_hash()
+    path = os.path.join(data_module.FOLDER_PATH, GT_DATA_HASHES_FILE_NAME)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "fingerprint": data_module.get_data_fingerprint(),
+                "data_hash_scheme": DATA_HASH_SCHEME,
+                "gt_data_hashes": gt_data_hashes,
+            },
+            f,
+            indent=2,
+        )
+    return path
+
@@ -0,0 +1,41 @@
+# Copyright Sierra
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from tau_bench.envs.base import Env
+
+
+class EnvPool(object):
+    """A thread-safe pool of pre-built environments that are reused across tasks.
+
+    Building an env rebuilds its tool map and tool schemas and a new user simulator, so
+    instead a free env is checked out, pointed at the task, and returned when the task is
+    done. A new env is only built when every existing one is checked out.
+    """
+
+    def __init__(self, env_factory: Callable[[], Env]) -> None:
+        self.env_factory = env_factory
+        self.free_envs: List[Env] = []
+        self.lock = threading.Lock()
+
+    def acquire(self, task_index: int) -> Env:
+        with self.lock:
+            env = self.free_envs.pop() if self.free_envs else None
+        if env is None:
+            env = self.env_factory()
+        env.set_task(task_index)
+        return env
+
+    def release(self, env: Env) -> None:
+        with self.lock:
+            self.free_envs.append(env)
+
+    @contextmanager
+    def checkout(self, task_index: int) -> Iterator[Env]:
+        env = self.acquire(task_index)
+        try:
+            yield env
+        finally:
+            self.release(env)
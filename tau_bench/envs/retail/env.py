@@ -1,13 +1,25 @@
 # Copyright Sierra
 
 from tau_bench.envs.base import Env
-from tau_bench.envs.retail.data import load_data
+from tau_bench.envs.gt_data_hashes import load_gt_data_hashes
+from tau_bench.envs.task_store import load_tasks
+from tau_bench.envs.retail.data import (
+    FOLDER_PATH,
+    get_data_fingerprint,
+    load_baseline_data,
+)
 from tau_bench.envs.retail.rules import RULES
 from tau_bench.envs.retail.tools import ALL_TOOLS
 from tau_bench.envs.retail.wiki import WIKI
 from typing import Optional, Union
 from tau_bench.envs.user import UserStrategy
 
+TASK_SPLITS = {
+    "test": ("tau_bench.envs.retail.tasks_test", "TASKS_TEST"),
+    "train": ("tau_bench.envs.retail.tasks_train", "TASKS_TRAIN"),
+    "dev": ("tau_bench.envs.retail.tasks_dev", "TASKS_DEV"),
+}
+
 
 class MockRetailDomainEnv(Env):
     def __init__(
@@ -18,17 +30,11 @@ class MockRetailDomainEnv(Env):
         task_split: str = "test",
         task_index: Optional[int] = None,
     ):
-        match task_split:
-            case "test":
-                from tau_bench.envs.retail.tasks_test import TASKS_TEST as tasks
-            case "train":
-                from tau_bench.envs.retail.tasks_train import TASKS_TRAIN as tasks
-            case "dev":
-                from tau_bench.envs.retail.tasks_dev import TASKS_DEV as tasks
-            case _:
-                raise ValueError(f"Unknown task split: {task_split}")
+        if task_split not in TASK_SPLITS:
+            raise ValueError(f"Unknown task split: {task_split}")
+        tasks = load_tasks(*TASK_SPLITS[task_split])
         super().__init__(
-            data_load_func=load_data,
+            data_load_func=load_baseline_data,
             tools=ALL_TOOLS,
             tasks=tasks,
             wiki=WIKI,
@@ -37,5 +43,6 @@ class MockRetailDomainEnv(Env):
             user_model=user_model,
             user_provider=user_provider,
             task_index=task_index,
+            gt_data_hashes=load_gt_data_hashes(FOLDER_PATH, get_data_fingerprint()),
         )
         self.terminate_tools = ["transfer_to_human_agents"]
@@ -0,0 +1,76 @@
+# Copyright Sierra
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from tau_bench.envs.db import CowTable, TableIndex, get_baseline_index
+
+
+def get_email_keys(profile: Dict[str, Any]) -> List[str]:
+    return [profile["email"].lower()]
+
+
+def get_name_zip_keys(profile: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    return [
+        (
+            profile["name"]["first_name"].lower(),
+            profile["name"]["last_name"].lower(),
+            profile["address"]["zip"],
+        )
+    ]
+
+
+EMAIL_INDEX = TableIndex(get_email_keys)
+NAME_ZIP_INDEX = TableIndex(get_name_zip_keys)
+
+
+def build_item_index(products: Mapping[str, Any]) -> Dict[str, str]:
+    # item ids are unique across products
+    return {
+        item_id: product_id
+        for product_id, product in products.items()
+        for item_id in product["variants"]
+    }
+
+
+def find_variant(
+    products: Mapping[str, Any], item_id: str
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Returns the product id and the variant of an item, or None if no product has it.
+
+    The product is not copied, so the variant must be treated as read-only.
+    """
+    if not isinstance(products, CowTable):
+        for product_id, product in products.items():
+            if item_id in product["variants"]:
+                return product_id, product["variants"][item_id]
+        return None
+    for product_id, product in products.local.items():
+        if item_id in product["variants"]:
+            return product_id, product["variants"][item_id]
+    product_id = get_baseline_index(products.base, build_item_index).get(item_id)
+    if product_id is None or product_id in products.local or product_id in products.deleted:
+        return None
+    return product_id, products.base[product_id]["variants"][item_id]
+
+
+def get_item_counts(order: Dict[str, Any]) -> Counter:
+    return Counter(item["item_id"] for item in order["items"])
+
+
+def find_missing_item(order: Dict[str, Any], item_ids: List[str]) -> Optional[str]:
+    """Returns the first of `item_ids` that is requested more times than the order has it."""
+    item_counts = get_item_counts(order)
+    requested_counts = Counter(item_ids)
+    for item_id in item_ids:
+        if requested_counts[item_id] > item_counts[item_id]:
+            return item_id
+    return None
+
+
+def get_item_positions(order: Dict[str, Any]) -> Dict[str, List[int]]:
+    # the positions of each item id in the order, in ascending order
+    positions = defaultdict(list)
+    for i, item in enumerate(order["items"]):
+        positions[item["item_id"]].append(i)
+    return positions
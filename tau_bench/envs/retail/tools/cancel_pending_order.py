@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -42,7 +42,7 @@ class CancelPendingOrder(Tool):
         order["cancel_reason"] = reason
         order["payment_history"].extend(refunds)
 
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,8 +1,13 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict, List
 
+from tau_bench import serializer
+from tau_bench.envs.retail.indexes import (
+    find_missing_item,
+    find_variant,
+    get_item_positions,
+)
 from tau_bench.envs.tool import Tool
 
 
@@ -25,27 +30,25 @@ class ExchangeDeliveredOrderItems(Tool):
             return "Error: non-delivered order cannot be exchanged"
 
         # check the items to be exchanged exist
-        all_item_ids = [item["item_id"] for item in order["items"]]
-        for item_id in item_ids:
-            if item_ids.count(item_id) > all_item_ids.count(item_id):
-                return f"Error: {item_id} not found"
+        missing_item_id = find_missing_item(order, item_ids)
+        if missing_item_id is not None:
+            return f"Error: {missing_item_id} not found"
 
         # check new items exist and match old items and are available
         if len(item_ids) != len(new_item_ids):
             return "Error: the number of items to be exchanged should match"
 
+        item_positions = get_item_positions(order)
         diff_price = 0
         for item_id, new_item_id in zip(item_ids, new_item_ids):
-            item = [item for item in order["items"] if item["item_id"] == item_id][0]
+            item = order["items"][item_positions[item_id][0]]
             product_id = item["product_id"]
-            if not (
-                new_item_id in products[product_id]["variants"]
-                and products[product_id]["variants"][new_item_id]["available"]
-            ):
+            found = find_variant(products, new_item_id)
+            if found is None or found[0] != product_id or not found[1]["available"]:
                 return f"Error: new item {new_item_id} not found or available"
 
             old_price = item["price"]
-            new_price = products[product_id]["variants"][new_item_id]["price"]
+            new_price = found[1]["price"]
             diff_price += new_price - old_price
 
         diff_price = round(diff_price, 2)
@@ -70,7 +73,7 @@ class ExchangeDeliveredOrderItems(Tool):
         order["exchange_payment_method_id"] = payment_method_id
         order["exchange_price_difference"] = diff_price
 
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
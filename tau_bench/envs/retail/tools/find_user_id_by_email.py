@@ -1,17 +1,19 @@
 # Copyright Sierra
 
 from typing import Any, Dict
+from tau_bench.envs.retail.indexes import EMAIL_INDEX
 from tau_bench.envs.tool import Tool
 
 
 class FindUserIdByEmail(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], email: str) -> str:
-        users = data["users"]
-        for user_id, profile in users.items():
-            if profile["email"].lower() == email.lower():
-                return user_id
-        return "Error: user not found"
+        users = EMAIL_INDEX.find(data["users"], email.lower())
+        if not users:
+            return "Error: user not found"
+        return users[0][0]
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,21 +1,21 @@
 # Copyright Sierra
 
 from typing import Any, Dict
+from tau_bench.envs.retail.indexes import NAME_ZIP_INDEX
 from tau_bench.envs.tool import Tool
 
 
 class FindUserIdByNameZip(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], first_name: str, last_name: str, zip: str) -> str:
-        users = data["users"]
-        for user_id, profile in users.items():
-            if (
-                profile["name"]["first_name"].lower() == first_name.lower()
-                and profile["name"]["last_name"].lower() == last_name.lower()
-                and profile["address"]["zip"] == zip
-            ):
-                return user_id
-        return "Error: user not found"
+        users = NAME_ZIP_INDEX.find(
+            data["users"], (first_name.lower(), last_name.lower(), zip)
+        )
+        if not users:
+            return "Error: user not found"
+        return users[0][0]
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
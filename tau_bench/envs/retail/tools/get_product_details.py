@@ -1,16 +1,18 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
 class GetProductDetails(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any], product_id: str) -> str:
         products = data["products"]
         if product_id in products:
-            return json.dumps(products[product_id])
+            return serializer.dumps(products[product_id])
         return "Error: product not found"
 
     @staticmethod
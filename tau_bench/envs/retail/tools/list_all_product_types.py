@@ -1,11 +1,13 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
 class ListAllProductTypes(Tool):
+    read_only = True
+
     @staticmethod
     def invoke(data: Dict[str, Any]) -> str:
         products = data["products"]
@@ -13,7 +15,7 @@ class ListAllProductTypes(Tool):
             product["name"]: product["product_id"] for product in products.values()
         }
         product_dict = dict(sorted(product_dict.items()))
-        return json.dumps(product_dict)
+        return serializer.dumps(product_dict)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -34,7 +34,7 @@ class ModifyPendingOrderAddress(Tool):
             "country": country,
             "zip": zip,
         }
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,14 @@
 # Copyright Sierra
 
-import json
+import bisect
 from typing import Any, Dict, List
+from tau_bench import serializer
+from tau_bench.envs.db import copy_record
+from tau_bench.envs.retail.indexes import (
+    find_missing_item,
+    find_variant,
+    get_item_positions,
+)
 from tau_bench.envs.tool import Tool
 
 
@@ -24,27 +31,25 @@ class ModifyPendingOrderItems(Tool):
             return "Error: non-pending order cannot be modified"
 
         # Check if the items to be modified exist
-        all_item_ids = [item["item_id"] for item in order["items"]]
-        for item_id in item_ids:
-            if item_ids.count(item_id) > all_item_ids.count(item_id):
-                return f"Error: {item_id} not found"
+        missing_item_id = find_missing_item(order, item_ids)
+        if missing_item_id is not None:
+            return f"Error: {missing_item_id} not found"
 
         # Check new items exist, match old items, and are available
         if len(item_ids) != len(new_item_ids):
             return "Error: the number of items to be exchanged should match"
 
+        item_positions = get_item_positions(order)
         diff_price = 0
         for item_id, new_item_id in zip(item_ids, new_item_ids):
-            item = [item for item in order["items"] if item["item_id"] == item_id][0]
+            item = order["items"][item_positions[item_id][0]]
             product_id = item["product_id"]
-            if not (
-                new_item_id in products[product_id]["variants"]
-                and products[product_id]["variants"][new_item_id]["available"]
-            ):
+            found = find_variant(products, new_item_id)
+            if found is None or found[0] != product_id or not found[1]["available"]:
                 return f"Error: new item {new_item_id} not found or available"
 
             old_price = item["price"]
-            new_price = products[product_id]["variants"][new_item_id]["price"]
+            new_price = found[1]["price"]
             diff_price += new_price - old_price
 
         # Check if the payment method exists
@@ -73,17 +78,17 @@ class ModifyPendingOrderItems(Tool):
 
         # Modify the order
         for item_id, new_item_id in zip(item_ids, new_item_ids):
-            item = [item for item in order["items"] if item["item_id"] == item_id][0]
+            # the first item that still has the old id, since ids change along the way
+            position = item_positions[item_id].pop(0)
+            bisect.insort(item_positions[new_item_id], position)
+            item = order["items"][position]
+            _, variant = find_variant(products, new_item_id)
             item["item_id"] = new_item_id
-            item["price"] = products[item["product_id"]]["variants"][new_item_id][
-                "price"
-            ]
-            item["options"] = products[item["product_id"]]["variants"][new_item_id][
-                "options"
-            ]
+            item["price"] = variant["price"]
+            item["options"] = copy_record(variant["options"])
         order["status"] = "pending (item modified)"
 
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -81,7 +81,7 @@ class ModifyPendingOrderPayment(Tool):
             old_payment_method["balance"] += amount
             old_payment_method["balance"] = round(old_payment_method["balance"], 2)
 
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
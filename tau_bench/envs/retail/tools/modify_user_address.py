@@ -1,7 +1,7 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict
+from tau_bench import serializer
 from tau_bench.envs.tool import Tool
 
 
@@ -29,7 +29,7 @@ class ModifyUserAddress(Tool):
             "country": country,
             "zip": zip,
         }
-        return json.dumps(user)
+        return serializer.dumps(user)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
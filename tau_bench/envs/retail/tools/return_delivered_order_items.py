@@ -1,7 +1,8 @@
 # Copyright Sierra
 
-import json
 from typing import Any, Dict, List
+from tau_bench import serializer
+from tau_bench.envs.retail.indexes import find_missing_item
 from tau_bench.envs.tool import Tool
 
 
@@ -29,17 +30,15 @@ class ReturnDeliveredOrderItems(Tool):
             return "Error: payment method should be either the original payment method or a gift card"
 
         # Check if the items to be returned exist (there could be duplicate items in either list)
-        all_item_ids = [item["item_id"] for item in order["items"]]
-        for item_id in item_ids:
-            if item_ids.count(item_id) > all_item_ids.count(item_id):
-                return "Error: some item not found"
+        if find_missing_item(order, item_ids) is not None:
+            return "Error: some item not found"
 
         # Update the order status
         order["status"] = "return requested"
         order["return_items"] = sorted(item_ids)
         order["return_payment_method_id"] = payment_method_id
 
-        return json.dumps(order)
+        return serializer.dumps(order)
 
     @staticmethod
     def get_info() -> Dict[str, Any]:
@@ -0,0 +1,189 @@
+# Copyright Sierra
+
+"""Validation of tool call arguments against the JSON schema of the tool's parameters.
+
+Only the parts of JSON schema used by the tools' `get_info` are supported: `type`, `enum`,
+`properties`, `required`, `items`, `anyOf` and local `$ref`s to `$defs`. Other keywords
+are ignored.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# returns an error message for the arguments of a tool call, or None if they are valid
+Validator = Callable[[Dict[str, Any]], Optional[str]]
+
+# checks a value at a path such as "passengers[0].first_name"
+_Check = Callable[[Any, str], Optional[str]]
+
+TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    # JSON has one number type, so 2.0 is an integer as well
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+    or (isinstance(value, float) and value.is_integer()),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+    "null": lambda value: value is None,
+}
+
+TYPE_NAMES = {
+    "string": "a string",
+    "integer": "an integer",
+    "number": "a number",
+    "boolean": "a boolean",
+    "array": "an array",
+    "object": "an object",
+    "null": "null",
+}
+
+
+def get_type_name(value: Any) -> str:
+    for name in ["boolean", "integer", "number", "string", "array", "object", "null"]:
+        if TYPE_CHECKS[name](value):
+            return name
+    return type(value).__name__
+
+
+def compile_validator(
+    schema: Dict[str, Any], optional: Iterable[str] = ()
+) -> Validator:
+    """Compiles the schema of a tool's parameters, which must be an object, into a validator.
+
+    Arguments in `optional` may be left out even if the schema requires them, since the
+    tool has a default for them.
+    """
+    schema = {
+        **schema,
+        "required": [
+            name for name in schema.get("required", []) if name not in optional
+        ],
+    }
+    check = _compile(schema, schema.get("$defs", {}))
+    properties = schema.get("properties", {})
+
+    def validate(kwargs: Dict[str, Any]) -> Optional[str]:
+        # arguments the schema doesn't declare would only fail later as unexpected keywords of invoke
+        for name in kwargs:
+            if name not in properties:
+                return f"unexpected argument '{name}'"
+        return check(kwargs, "")
+
+    return validate
+
+
+def _compile(schema: Dict[str, Any], defs: Dict[str, Any]) -> _Check:
+    if "$ref" in schema:
+        return _compile(defs[schema["$ref"].split("/")[-1]], defs)
+    checks: List[_Check] = []
+    if "anyOf" in schema:
+        checks.append(_compile_any_of(schema["anyOf"], defs))
+    if "type" in schema:
+        checks.append(_compile_type(schema["type"]))
+    if "enum" in schema:
+        checks.append(_compile_enum(schema["enum"]))
+    if "properties" in schema or "required" in schema:
+        checks.append(
+            _compile_properties(
+                schema.get("properties", {}), schema.get("required", []), defs
+            )
+        )
+    if "items" in schema:
+        checks.append(_compile_items(schema["items"], defs))
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value: Any, path: str) -> Optional[str]:
+        for check_one in checks:
+            error = check_one(value, path)
+            if error is not None:
+                return error
+        return None
+
+    return check
+
+
+def _describe(path: str) -> str:
+    return f"argument '{path}'" if path else "the arguments"
+
+
+def _compile_type(types: Any) -> _Check:
+    if isinstance(types, str):
+        types = [types]
+    type_checks = [TYPE_CHECKS[name] for name in types]
+    expected = " or ".join(TYPE_NAMES[name] for name in types)
+
+    def check(value: Any, path: str) -> Optional[str]:
+        if any(type_check(value) for type_check in type_checks):
+            return None
+        return f"{_describe(path)} must be {expected}, not {get_type_name(value)}"
+
+    return check
+
+
+def _compile_enum(enum: List[Any]) -> _Check:
+    def check(value: Any, path: str) -> Optional[str]:
+        if value in enum:
+            return None
+        return f"{_describe(path)} must be one of {enum}, not {value!r}"
+
+    return check
+
+
+def _compile_properties(
+    properties: Dict[str, Any], required: List[str], defs: Dict[str, Any]
+) -> _Check:
+    property_checks = {
+        name: _compile(property_schema, defs)
+        for name, property_schema in properties.items()
+    }
+
+    def check(value: Any, path: str) -> Optional[str]:
+        if not isinstance(value, dict):
+            return None
+        for name in required:
+            if name not in value:
+                return f"missing required {_describe(_join(path, name))}"
+        for name, property_check in property_checks.items():
+            if name in value:
+                error = property_check(value[name], _join(path, name))
+                if error is not None:
+                    return error
+        return None
+
+    return check
+
+
+def _join(path: str, name: str) -> str:
+    return f"{path}.{name}" if path else name
+
+
+def _compile_items(items: Dict[str, Any], defs: Dict[str, Any]) -> _Check:
+    item_check = _compile(items, defs)
+
+    def check(value: Any, path: str) -> Optional[str]:
+        if not isinstance(value, list):
+            return None
+        for i, item in enumerate(value):
+            error = item_check(item, f"{path}[{i}]")
+            if error is not None:
+                return error
+        return None
+
+    return check
+
+
+def _compile_any_of(schemas: List[Dict[str, Any]], defs: Dict[str, Any]) -> _Check:
+    alternatives = [_compile(schema, defs) for schema in schemas]
+
+    def check(value: Any, path: str) -> Optional[str]:
+        errors = []
+        for alternative in alternatives:
+            error = alternative(value, path)
+            if error is None:
+                return None
+            errors.append(error)
+        return " or ".join(errors)
+
+    return check
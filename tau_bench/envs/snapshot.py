@@ -0,0 +1,109 @@
+# Copyright Sierra
+
+import mmap
+import os
+import pickle
+import struct
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SNAPSHOT_MAGIC = b"TAUSNAP1"
+SNAPSHOT_FILE_NAME = "data.snapshot"
+
+# Worker processes that share one snapshot turn this off, so that each only holds the
+# records copied by its own episodes instead of decoding the whole database over time.
+CACHE_RECORDS = True
+
+_HEADER_LENGTH = struct.Struct("<Q")
+_DATA_OFFSET = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+
+
+def get_source_signature(source_paths: List[str]) -> List[Tuple[str, int, int]]:
+    # cheap to check on every load, unlike a content fingerprint of the JSON files
+    signature = []
+    for path in source_paths:
+        stat = os.stat(path)
+        signature.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+class SnapshotTable(Mapping):
+    """A read-only table whose records are unpickled from the memory-mapped snapshot on first access."""
+
+    def __init__(
+        self,
+        buffer: memoryview,
+        index: Dict[str, Tuple[int, int]],
+        cache_records: bool = True,
+    ) -> None:
+        self.buffer = buffer
+        self.index = index
+        self.cache_records = cache_records
+        self.records: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        record = self.records.get(key)
+        if record is None:
+            offset, length = self.index[key]
+            record = pickle.loads(self.buffer[offset : offset + length])
+            if self.cache_records:
+                self.records[key] = record
+        return record
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def build_snapshot(
+    path: str, data: Dict[str, Dict[str, Any]], source_paths: List[str]
+) -> None:
+    """Writes `data` as one pickle (protocol 5) per record, preceded by an index of their offsets."""
+    tables: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    records: List[bytes] = []
+    offset = 0
+    for name, table in data.items():
+        index = tables[name] = {}
+        for key, record in table.items():
+            blob = pickle.dumps(record, protocol=5)
+            index[key] = (offset, len(blob))
+            records.append(blob)
+            offset += len(blob)
+    header = pickle.dumps(
+        {"sources": get_source_signature(source_paths), "tables": tables}, protocol=5
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in records:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(
+    path: str, source_paths: List[str]
+) -> Optional[Dict[str, SnapshotTable]]:
+    """Memory-maps the snapshot at `path`, or returns None if it is missing or older than its sources."""
+    if not os.path.exists(path) or os.path.getsize(path) < _DATA_OFFSET:
+        return None
+    with open(path, "rb") as f:
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if buffer[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        return None
+    (header_length,) = _HEADER_LENGTH.unpack_from(buffer, len(SNAPSHOT_MAGIC))
+    header = pickle.loads(buffer[_DATA_OFFSET : _DATA_OFFSET + header_length])
+    if header["sources"] != get_source_signature(source_paths):
+        return None
+    records = buffer[_DATA_OFFSET + header_length :]
+    return {
+        name: SnapshotTable(records, index, cache_records=CACHE_RECORDS)
+        for name, index in header["tables"].items()
+    }
+
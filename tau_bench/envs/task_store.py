@@ -0,0 +1,62 @@
+# Copyright Sierra
+
+import importlib
+import importlib.util
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Union
+
+from tau_bench.envs.snapshot import build_snapshot, load_snapshot
+from tau_bench.types import Task
+
+
+class LazyTasks(Sequence):
+    """Tasks of a split that are only validated into `Task` models when they are indexed."""
+
+    def __init__(self, records: Mapping[str, Any]) -> None:
+        self.records = records
+        self.tasks: Dict[int, Task] = {}
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Task, List[Task]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("task index out of range")
+        task = self.tasks.get(index)
+        if task is None:
+            task = Task.model_validate(self.records[str(index)])
+            self.tasks[index] = task
+        return task
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def get_task_store_path(module_name: str) -> str:
+    # found without importing the module, which is what the store is there to avoid
+    module_path = importlib.util.find_spec(module_name).origin
+    return f"{module_path[: -len('.py')]}.snapshot"
+
+
+def build_task_store(module_name: str, attr: str) -> str:
+    tasks = getattr(importlib.import_module(module_name), attr)
+    path = get_task_store_path(module_name)
+    build_snapshot(
+        path,
+        {"tasks": {str(i): task.model_dump() for i, task in enumerate(tasks)}},
+        [importlib.util.find_spec(module_name).origin],
+    )
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_tasks(module_name: str, attr: str) -> Sequence:
+    """Loads the tasks in `module_name.attr`, from its task store when it is up to date."""
+    store = load_snapshot(
+        get_task_store_path(module_name), [importlib.util.find_spec(module_name).origin]
+    )
+    if store is None:
+        return getattr(importlib.import_module(module_name), attr)
+    return LazyTasks(store["tasks"])
@@ -1,8 +1,16 @@
 import abc
-from typing import Any
+import inspect
+from typing import Any, Dict, Type
+
+from tau_bench.envs.schema import Validator, compile_validator
+
+_VALIDATORS: Dict[Type["Tool"], Validator] = {}
 
 
 class Tool(abc.ABC):
+    # read-only tools never change the data, so Env.step can reuse their results
+    read_only = False
+
     @staticmethod
     def invoke(*args, **kwargs):
         raise NotImplementedError
@@ -10,3 +18,20 @@ class Tool(abc.ABC):
     @staticmethod
     def get_info() -> dict[str, Any]:
         raise NotImplementedError
+
+    @classmethod
+    def get_validator(cls) -> Validator:
+        # compiled once per process from the parameters in get_info
+        validator = _VALIDATORS.get(cls)
+        if validator is None:
+            parameters = inspect.signature(cls.invoke).parameters.values()
+            validator = compile_validator(
+                cls.get_info()["function"]["parameters"],
+                optional=[
+                    parameter.name
+                    for parameter in parameters
+                    if parameter.default is not inspect.Parameter.empty
+                ],
+            )
+            _VALIDATORS[cls] = validator
+        return validator
@@ -1,8 +1,9 @@
 # Copyright Sierra
 
 import abc
+import asyncio
 import enum
-from litellm import completion
+from tau_bench.rate_limit import acompletion, completion
 import logfire
 from typing import Optional, List, Dict, Any, Union
 
@@ -22,6 +23,14 @@ class BaseUserSimulationEnv(abc.ABC):
     def get_total_cost(self) -> float:
         raise NotImplementedError
 
+    # users that are not natively async run their synchronous methods in a thread
+
+    async def areset(self, instruction: Optional[str] = None) -> str:
+        return await asyncio.to_thread(self.reset, instruction)
+
+    async def astep(self, content: str) -> str:
+        return await asyncio.to_thread(self.step, content)
+
 
 class HumanUserSimulationEnv(BaseUserSimulationEnv):
     def reset(self, instruction: str) -> str:
@@ -46,33 +55,53 @@ class LLMUserSimulationEnv(BaseUserSimulationEnv):
     def _generate_message(self, messages: List[Dict[str, Any]]) -> str:
         """Sometimes, the model inexplicably returns an empty response, so we retry"""
 
-        message_content = ""
-        retries = 3
         copied_messages = messages.copy()
-        while not message_content and retries > 0:
+        for _ in range(3):
             res = completion(
                 model=self.model,
                 custom_llm_provider=self.provider,
                 messages=copied_messages,
             )
-            message = res.choices[0].message
-            message_content = message.content
-            retries -= 1
-            if not message_content:
-                copied_messages.append({"role": "assistant", "content": ""})
-                copied_messages.append(
-                    {
-                        "role": "user",
-                        "content": "You returned an empty response, which is disallowed. Please try again.",
-                    }
-                )
-
-        if not message_content:
+            if not self._ask_again_if_empty(res, copied_messages):
+                break
+        return self._check_message(res, copied_messages)
+
+    async def _agenerate_message(self, messages: List[Dict[str, Any]]) -> str:
+        """Same as `_generate_message`, with acompletion"""
+
+        copied_messages = messages.copy()
+        for _ in range(3):
+            res = await acompletion(
+                model=self.model,
+                custom_llm_provider=self.provider,
+                messages=copied_messages,
+            )
+            if not self._ask_again_if_empty(res, copied_messages):
+                break
+        return self._check_message(res, copied_messages)
+
+    @staticmethod
+    def _ask_again_if_empty(res, copied_messages: List[Dict[str, Any]]) -> bool:
+        if res.choices[0].message.content:
+            return False
+        copied_messages.append({"role": "assistant", "content": ""})
+        copied_messages.append(
+            {
+                "role": "user",
+                "content": "You returned an empty response, which is disallowed. Please try again.",
+            }
+        )
+        return True
+
+    @staticmethod
+    def _check_message(res, copied_messages: List[Dict[str, Any]]):
+        message = res.choices[0].message
+        if not message.content:
             raise ValueError("Failed to generate a non-empty user message")
 
         logfire.info(
             "Customer msg: {msg}",
-            msg=message_content,
+            msg=message.content,
             messages=copied_messages,
             completion=res,
             _tags=["CustomerLLM"],
@@ -80,7 +109,12 @@ class LLMUserSimulationEnv(BaseUserSimulationEnv):
         return res, message
 
     def generate_next_message(self, messages: List[Dict[str, Any]]) -> str:
-        res, message = self._generate_message(messages)
+        return self._add_message(*self._generate_message(messages))
+
+    async def agenerate_next_message(self, messages: List[Dict[str, Any]]) -> str:
+        return self._add_message(*await self._agenerate_message(messages))
+
+    def _add_message(self, res, message) -> str:
         self.messages.append(message.model_dump())
         self.total_cost = res._hidden_params["response_cost"]
         return message.content
@@ -125,11 +159,23 @@ class LLMUserSimulationEnv(BaseUserSimulationEnv):
         self.messages.append({"role": "user", "content": content})
         return self.generate_next_message(self.messages)
 
+    async def areset(self, instruction: Optional[str] = None) -> str:
+        self.reset_messages(instruction)
+        return await self.agenerate_next_message(self.messages)
+
+    async def astep(self, content: str) -> str:
+        self.messages.append({"role": "user", "content": content})
+        return await self.agenerate_next_message(self.messages)
+
     def get_total_cost(self) -> float:
         return self.total_cost
 
 
 class ReactUserSimulationEnv(LLMUserSimulationEnv):
+    # generates messages differently from LLMUserSimulationEnv, so not natively async
+    areset = BaseUserSimulationEnv.areset
+    astep = BaseUserSimulationEnv.astep
+
     def __init__(self, model: str, provider: str) -> None:
         super().__init__(model=model, provider=provider)
         self.reset()
@@ -198,6 +244,10 @@ User Response:
 
 
 class VerifyUserSimulationEnv(LLMUserSimulationEnv):
+    # generates messages differently from LLMUserSimulationEnv, so not natively async
+    areset = BaseUserSimulationEnv.areset
+    astep = BaseUserSimulationEnv.astep
+
     def __init__(self, model: str, provider: str, max_attempts: int = 3) -> None:
         self.model = model
         self.provider = provider
@@ -312,6 +362,10 @@ Response:
 
 
 class ReflectionUserSimulationEnv(LLMUserSimulationEnv):
+    # generates messages differently from LLMUserSimulationEnv, so not natively async
+    areset = BaseUserSimulationEnv.areset
+    astep = BaseUserSimulationEnv.astep
+
     def __init__(self, model: str, provider: str, max_attempts: int = 2) -> None:
         self.model = model
         self.provider = provider
@@ -0,0 +1,178 @@
+# Copyright Sierra
+
+"""Per-provider rate limits for the LLM calls of agents and user simulators.
+
+`completion` and `acompletion` are drop-in replacements for litellm's. When a rate limit
+is set for the `custom_llm_provider` of a call, the call first reserves one request and an
+estimate of its tokens from the provider's buckets and waits until they are available.
+Once the response comes back, the estimate is corrected with the tokens actually used.
+A 429 pauses every call to the provider, for longer after every 429 in a row, instead of
+each call retrying on its own.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import litellm
+
+MAX_RETRIES = 8
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class TokenBucket(object):
+    """Refills at `rate_per_minute`, up to a second's worth, since providers enforce per
+    minute limits over shorter windows rather than allow a minute's worth at once.
+
+    A reservation is taken from the bucket right away, even if that leaves the level below
+    zero; the caller then waits until the bucket would have refilled to zero, so callers
+    are served in the order they reserved.
+    """
+
+    def __init__(self, rate_per_minute: float) -> None:
+        self.rate = rate_per_minute / 60
+        self.capacity = self.rate
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` from the bucket and returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(
+                self.capacity, self.level + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        # a negative amount takes more from the bucket
+        with self.lock:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter(object):
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None) -> None:
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.backoff = 0.0
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, num_tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(num_tokens))
+        return max(delay, self.get_pause())
+
+    def get_pause(self) -> float:
+        with self.lock:
+            return max(0.0, self.paused_until - time.monotonic())
+
+    def on_response(self, num_tokens: int, res: Any) -> None:
+        if self.tokens is not None:
+            used = get_total_tokens(res)
+            if used is not None:
+                self.tokens.refund(num_tokens - used)
+        with self.lock:
+            # every response without a 429 halves the next pause
+            self.backoff /= 2
+
+    def on_rate_limited(self, num_tokens: int, e: Exception) -> None:
+        if self.tokens is not None:
+            self.tokens.refund(num_tokens)
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                # sent before the pause began, so it says nothing about whether the pause is long enough
+                return
+            self.backoff = min(max(self.backoff * 2, INITIAL_BACKOFF), MAX_BACKOFF)
+            pause = max(self.backoff, get_retry_after(e) or 0.0)
+            # jittered, so that the paused calls don't all retry at the same moment
+            self.paused_until = now + pause * random.uniform(1.0, 1.5)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+
+
+def set_rate_limit(
+    provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None
+) -> None:
+    if rpm or tpm:
+        _LIMITERS[provider] = RateLimiter(rpm=rpm, tpm=tpm)
+    else:
+        _LIMITERS.pop(provider, None)
+
+
+def get_rate_limiter(provider: Optional[str]) -> Optional[RateLimiter]:
+    return _LIMITERS.get(provider) if provider is not None else None
+
+
+def estimate_tokens(kwargs: Dict[str, Any]) -> int:
+    # about four characters per token; corrected with the usage of the response
+    try:
+        prompt = json.dumps(kwargs.get("messages", []))
+    except TypeError:
+        prompt = str(kwargs.get("messages", []))
+    return len(prompt) // 4 + (kwargs.get("max_tokens") or 0)
+
+
+def get_total_tokens(res: Any) -> Optional[int]:
+    usage = getattr(res, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def get_retry_after(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def completion(**kwargs: Any) -> Any:
+    limiter = get_rate_limiter(kwargs.get("custom_llm_provider"))
+    if limiter is None:
+        return litellm.completion(**kwargs)
+    num_tokens = estimate_tokens(kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        time.sleep(limiter.reserve(num_tokens))
+        # a 429 while this call waited pauses it as well
+        time.sleep(limiter.get_pause())
+        try:
+            res = litellm.completion(**kwargs)
+        except litellm.RateLimitError as e:
+            limiter.on_rate_limited(num_tokens, e)
+            if attempt == MAX_RETRIES:
+                raise
+            continue
+        limiter.on_response(num_tokens, res)
+        return res
+
+
+async def acompletion(**kwargs: Any) -> Any:
+    limiter = get_rate_limiter(kwargs.get("custom_llm_provider"))
+    if limiter is None:
+        return await litellm.acompletion(**kwargs)
+    num_tokens = estimate_tokens(kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        await asyncio.sleep(limiter.reserve(num_tokens))
+        # a 429 while this call waited pauses it as well
+        await asyncio.sleep(limiter.get_pause())
+        try:
+            res = await litellm.acompletion(**kwargs)
+        except litellm.RateLimitError as e:
+            limiter.on_rate_limited(num_tokens, e)
+            if attempt == MAX_RETRIES:
+                raise
+            continue
+        limiter.on_response(num_tokens, res)
+        return res
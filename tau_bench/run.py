@@ -2,18 +2,36 @@
 
 import os
 import json
+import asyncio
 import random
+import functools
+import importlib
+import time
 import traceback
 from math import comb
 import multiprocessing
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from collections import defaultdict
 
-from tau_bench.envs import get_env
+from tau_bench.envs import get_env, snapshot
+from tau_bench.checkpoint import CHECKPOINT_SUFFIX, CheckpointWriter, load_checkpoint
+from tau_bench.rate_limit import set_rate_limit
+from tau_bench.schedule import load_expected_lengths, order_longest_first
+from tau_bench.serializer import set_serializer
+from tau_bench.envs.base import Env
+from tau_bench.envs.db import DATA_HASH_SCHEME
+from tau_bench.envs.pool import EnvPool
+from tau_bench.envs.snapshot import load_snapshot
 from tau_bench.agents.base import Agent
-from tau_bench.types import EnvRunResult, RunConfig
+from tau_bench.types import EnvRunResult, RewardResult, RunConfig, SolveResult
 from litellm import provider_list
 from tau_bench.envs.user import UserStrategy
 
@@ -28,10 +46,17 @@ def run(config: RunConfig, custom_json_encoder = None) -> List[EnvRunResult]:
     assert config.user_strategy in [item.value for item in UserStrategy], "Invalid user strategy"
 
     json_encoder = custom_json_encoder or json.JSONEncoder
+    serializer = set_serializer(config.serializer)
+    set_rate_limits(config)
 
     random.seed(config.seed)
     time_str = datetime.now().strftime("%m%d%H%M%S")
     ckpt_path = f"{config.log_dir}/{config.agent_strategy or 'custom'}-{config.model.split('/')[-1]}-{config.temperature}_range_{config.start_index}-{config.end_index}_user-{config.user_model.split('/')[-1]}-{config.user_strategy}_{time_str}.json"
+    if config.resume_path is not None and config.resume_path.endswith(CHECKPOINT_SUFFIX):
+        # keep appending to the checkpoint of the run that stopped
+        ckpt_path = f"{os.path.splitext(config.resume_path)[0]}.json"
+    # results are appended here as tasks finish, and saved to ckpt_path as one JSON list at the end
+    stream_path = f"{os.path.splitext(ckpt_path)[0]}{CHECKPOINT_SUFFIX}"
     if not os.path.exists(config.log_dir):
         os.makedirs(config.log_dir)
 
@@ -42,6 +67,7 @@ def run(config: RunConfig, custom_json_encoder = None) -> List[EnvRunResult]:
         user_model=config.user_model,
         user_provider=config.user_model_provider,
         task_split=config.task_split,
+        extra_tools=config.extra_tools,
     )
     agent = agent_factory(
         tools_info=env.tools_info,
@@ -52,12 +78,11 @@ def run(config: RunConfig, custom_json_encoder = None) -> List[EnvRunResult]:
         len(env.tasks) if config.end_index == -1 else min(config.end_index, len(env.tasks))
     )
     results: List[EnvRunResult] = []
-    lock = multiprocessing.Lock()
     if config.task_ids and len(config.task_ids) > 0:
-        print(f"Running tasks {config.task_ids} (checkpoint path: {ckpt_path})")
+        print(f"Running tasks {config.task_ids} (checkpoint path: {stream_path})")
     else:
         print(
-            f"Running tasks {config.start_index} to {end_index} (checkpoint path: {ckpt_path})"
+            f"Running tasks {config.start_index} to {end_index} (checkpoint path: {stream_path})"
     )
 
     if config.task_ids and len(config.task_ids) > 0:
@@ -69,74 +94,337 @@ def run(config: RunConfig, custom_json_encoder = None) -> List[EnvRunResult]:
 
     idxs = idxs * config.num_trials
     idx_to_trial = defaultdict(lambda: -1)
+    trials = []
+    for idx in idxs:
+        idx_to_trial[idx] += 1
+        trials.append(idx_to_trial[idx])
+
+    resumed: Dict[Tuple[int, int], EnvRunResult] = {}
+    if config.resume_path is not None:
+        planned = set(zip(idxs, trials))
+        num_failed = 0
+        other_schemes = 0
+        for data in load_checkpoint(config.resume_path):
+            result = EnvRunResult(**data)
+            if (result.task_id, result.trial) not in planned:
+                continue
+            if "error" in result.info:
+                # crashed, e.g. on a rate limit or a timeout, so it runs again
+                num_failed += 1
+                continue
+            if get_data_hash_scheme(result) != DATA_HASH_SCHEME:
+                other_schemes += 1
+            resumed[(result.task_id, result.trial)] = result
+        print(
+            f"Resuming from {config.resume_path}: {len(resumed)} of {len(planned)} (task, trial) pairs are done, {num_failed} failed ones run again"
+        )
+        if other_schemes > 0:
+            # each reward only compares hashes within its own episode, so it still holds, but
+            # the gt_data_hash values of these results can't be compared with the new ones
+            print(
+                f"Warning: {other_schemes} resumed results were graded with another data hash scheme than {DATA_HASH_SCHEME}"
+            )
+    remaining = [
+        (idx, trial) for idx, trial in zip(idxs, trials) if (idx, trial) not in resumed
+    ]
+    if config.schedule_paths:
+        expected_lengths = load_expected_lengths(config.schedule_paths, config.schedule_by)
+        remaining = order_longest_first(remaining, expected_lengths)
+        print(
+            f"Scheduling longest first by {config.schedule_by}: {len(expected_lengths)} tasks have a history"
+        )
+
+    checkpoint_writer = CheckpointWriter(stream_path, json_encoder=json_encoder)
+    if stream_path != config.resume_path:
+        # a checkpoint holds every result of its run, including the ones resumed from elsewhere
+        for result in resumed.values():
+            checkpoint_writer.write(result)
+
+    def _save(result: EnvRunResult) -> None:
+        checkpoint_writer.write(result)
 
-    def _run(idx: int) -> EnvRunResult:
-        isolated_env = get_env(
+    reward_executor = None
+    if config.reward_processes > 0:
+        # spawned rather than forked, since the agent threads may hold locks when a worker starts
+        reward_executor = ProcessPoolExecutor(
+            max_workers=config.reward_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    env.reward_executor = reward_executor
+    env.lean_info = config.lean_step_info
+    env_pool = make_env_pool(config, reward_executor)
+    env_pool.release(env)
+
+    def _run(idx: int, trial: int) -> EnvRunResult:
+        result = run_task(env_pool, agent, idx, trial)
+        _save(result)
+        return result
+
+    worker_results: Dict[Tuple[int, int], EnvRunResult] = {}
+
+    def _save_worker_result(future: "Future[EnvRunResult]", idx: int, trial: int) -> None:
+        # not re-raised, since a crashed worker fails the pairs still in the pool with one
+        # shared exception, whose traceback would grow with every raise
+        e = future.exception()
+        if e is None:
+            result = future.result()
+        else:
+            result = make_error_result(e, idx, trial)
+            print_result(result)
+        worker_results[(idx, trial)] = result
+        _save(result)
+
+    try:
+        if config.num_processes > 1:
+            # the workers share one memory-mapped snapshot of the database instead of each parsing
+            # the JSON; it is only built by build_data_snapshots.py, since the package may be read-only
+            data_module = importlib.import_module(f"tau_bench.envs.{config.env}.data")
+            if load_snapshot(data_module.SNAPSHOT_PATH, data_module.DATA_FILE_PATHS) is None:
+                print(
+                    f"No up-to-date data snapshot for {config.env}, so each worker parses the JSON data. "
+                    f"Build one with: python build_data_snapshots.py --env {config.env}"
+                )
+            # spawned rather than forked, since the checkpoint writer and agent threads
+            # may hold locks when a worker starts
+            with ProcessPoolExecutor(
+                max_workers=config.num_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(config,),
+            ) as executor:
+                for idx, trial in remaining:
+                    try:
+                        future = executor.submit(_run_in_worker, idx, trial)
+                    except BrokenExecutor as e:
+                        future = Future()
+                        future.set_exception(e)
+                    future.add_done_callback(
+                        functools.partial(_save_worker_result, idx=idx, trial=trial)
+                    )
+            # every callback has run once the executor has shut down
+            results.extend(worker_results[pair] for pair in remaining)
+        elif config.use_async:
+            results.extend(
+                asyncio.run(
+                    run_tasks_async(
+                        env_pool, agent, remaining, config.max_concurrency, _save
+                    )
+                )
+            )
+        else:
+            with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+                res = list(executor.map(_run, *zip(*remaining))) if remaining else []
+                results.extend(res)
+    finally:
+        checkpoint_writer.close()
+    if reward_executor is not None:
+        reward_executor.shutdown()
+
+    if resumed or config.schedule_paths:
+        # in the order the pairs were planned, as if the run had never stopped or been reordered
+        new_results = dict(zip(remaining, results))
+        results = [
+            resumed[pair] if pair in resumed else new_results[pair]
+            for pair in zip(idxs, trials)
+        ]
+
+    display_metrics(results)
+
+    with open(ckpt_path, "w") as f:
+        serializer.dump_results(
+            [result.model_dump() for result in results], f, cls=json_encoder
+        )
+        print(f"\n📄 Results saved to {ckpt_path}\n")
+    return results
+
+
+def make_env_pool(
+    config: RunConfig, reward_executor: Optional[Executor] = None
+) -> EnvPool:
+    def _make_env() -> Env:
+        env = get_env(
             config.env,
             user_strategy=config.user_strategy,
             user_model=config.user_model,
             task_split=config.task_split,
             user_provider=config.user_model_provider,
-            task_index=idx,
+            extra_tools=config.extra_tools,
         )
-        idx_to_trial[idx] += 1
-        trial = idx_to_trial[idx]
+        env.reward_executor = reward_executor
+        env.lean_info = config.lean_step_info
+        return env
 
-        print(f"Running task {idx}")
-        try:
+    return EnvPool(_make_env)
+
+
+def run_task(env_pool: EnvPool, agent: Agent, idx: int, trial: int) -> EnvRunResult:
+    print(f"Running task {idx}")
+    start = time.monotonic()
+    try:
+        with env_pool.checkout(idx) as isolated_env:
             res = agent.solve(
                 env=isolated_env,
                 task_index=idx,
             )
-            result = EnvRunResult(
-                task_id=idx,
-                write_actions_diff=res.write_actions_diff,
-                reward=res.reward,
-                info=res.info,
-                key_actions=res.key_actions,
-                traj=res.messages,
-                trial=trial,
-                raw_messages=res.raw_messages,
-                node_turns=res.node_turns,
-                oai_messages=res.oai_messages,
-                anthropic_messages=res.anthropic_messages,
-                actions_diff=res.actions_diff,
-                total_cost=res.total_cost,
-                total_user_cost=res.total_user_cost,
-            )
-        except Exception as e:
-            result = EnvRunResult(
-                task_id=idx,
-                reward=0.0,
-                info={"error": str(e), "traceback": traceback.format_exc()},
-                traj=[],
-                trial=trial,
+            reward_res = None
+            if isolated_env.pending_reward is not None:
+                # resolved before the env goes back to the pool and the result is written
+                reward_res = isolated_env.pending_reward.result()
+            result = make_run_result(isolated_env, res, reward_res, idx, trial)
+            # lets later runs schedule this task by its wall-clock time
+            result.info["duration"] = time.monotonic() - start
+    except Exception as e:
+        result = make_error_result(e, idx, trial)
+    print_result(result)
+    return result
+
+
+async def run_task_async(
+    env_pool: EnvPool, agent: Agent, idx: int, trial: int
+) -> EnvRunResult:
+    print(f"Running task {idx}")
+    start = time.monotonic()
+    try:
+        with env_pool.checkout(idx) as isolated_env:
+            res = await agent.asolve(
+                env=isolated_env,
+                task_index=idx,
             )
-        print(
-            "✅" if result.reward == 1 else "❌",
-            f"task_id={idx}",
-            result.info,
-        )
-        print("-----")
-        with lock:
-            data = []
-            if os.path.exists(ckpt_path):
-                with open(ckpt_path, "r") as f:
-                    data = json.load(f)
-            with open(ckpt_path, "w") as f:
-                json.dump(data + [result.model_dump()], f, cls=json_encoder, indent=2)
+            reward_res = None
+            if isolated_env.pending_reward is not None:
+                reward_res = await asyncio.wrap_future(isolated_env.pending_reward)
+            result = make_run_result(isolated_env, res, reward_res, idx, trial)
+            # lets later runs schedule this task by its wall-clock time
+            result.info["duration"] = time.monotonic() - start
+    except Exception as e:
+        result = make_error_result(e, idx, trial)
+    print_result(result)
+    return result
+
+
+async def run_tasks_async(
+    env_pool: EnvPool,
+    agent: Agent,
+    pairs: List[Tuple[int, int]],
+    max_concurrency: int,
+    save: Callable[[EnvRunResult], None],
+) -> List[EnvRunResult]:
+    """Runs the (task, trial) pairs as episodes in one event loop, at most max_concurrency at a time."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run(idx: int, trial: int) -> EnvRunResult:
+        async with semaphore:
+            result = await run_task_async(env_pool, agent, idx, trial)
+        save(result)
         return result
 
-    with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
-        res = list(executor.map(_run, idxs))
-        results.extend(res)
+    return list(await asyncio.gather(*(_run(idx, trial) for idx, trial in pairs)))
 
-    display_metrics(results)
 
-    with open(ckpt_path, "w") as f:
-        json.dump([result.model_dump() for result in results], f, cls=json_encoder, indent=2)
-        print(f"\n📄 Results saved to {ckpt_path}\n")
-    return results
+def make_run_result(
+    env: Env,
+    res: SolveResult,
+    reward_res: Optional[RewardResult],
+    idx: int,
+    trial: int,
+) -> EnvRunResult:
+    if reward_res is not None:
+        res.reward = reward_res.reward
+        res.info["reward_info"] = reward_res.model_dump()
+    if env.lean_info:
+        res.info["task"] = env.task.model_dump()
+    return EnvRunResult(
+        task_id=idx,
+        write_actions_diff=res.write_actions_diff,
+        reward=res.reward,
+        info=res.info,
+        key_actions=res.key_actions,
+        traj=res.messages,
+        trial=trial,
+        raw_messages=res.raw_messages,
+        node_turns=res.node_turns,
+        oai_messages=res.oai_messages,
+        anthropic_messages=res.anthropic_messages,
+        actions_diff=res.actions_diff,
+        total_cost=res.total_cost,
+        total_user_cost=res.total_user_cost,
+    )
+
+
+def get_data_hash_scheme(result: EnvRunResult) -> Optional[str]:
+    # results without a reward info, e.g. of custom agents, are taken to be current
+    reward_info = result.info.get("reward_info")
+    if reward_info is None:
+        return DATA_HASH_SCHEME
+    return reward_info.get("data_hash_scheme")
+
+
+def make_error_result(e: Exception, idx: int, trial: int) -> EnvRunResult:
+    return EnvRunResult(
+        task_id=idx,
+        reward=0.0,
+        info={
+            "error": str(e),
+            "traceback": "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+        },
+        traj=[],
+        trial=trial,
+    )
+
+
+def print_result(result: EnvRunResult) -> None:
+    print(
+        "✅" if result.reward == 1 else "❌",
+        f"task_id={result.task_id}",
+        result.info,
+    )
+    print("-----")
+
+
+_worker_env_pool: Optional[EnvPool] = None
+_worker_agent: Optional[Agent] = None
+
+
+def _init_worker(config: RunConfig) -> None:
+    global _worker_env_pool, _worker_agent
+    # only keep the records copied by this worker's own episodes
+    snapshot.CACHE_RECORDS = False
+    set_serializer(config.serializer)
+    # each worker takes an equal share of the limits
+    set_rate_limits(config, share=1 / config.num_processes)
+    _worker_env_pool = make_env_pool(config)
+    env = _worker_env_pool.env_factory()
+    _worker_env_pool.release(env)
+    _worker_agent = agent_factory(tools_info=env.tools_info, wiki=env.wiki, config=config)
+
+
+def _run_in_worker(idx: int, trial: int) -> EnvRunResult:
+    return run_task(_worker_env_pool, _worker_agent, idx, trial)
+
+
+def set_rate_limits(config: RunConfig, share: float = 1.0) -> None:
+    limits: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+    for provider, rpm, tpm in [
+        (config.model_provider, config.model_rpm, config.model_tpm),
+        (config.user_model_provider, config.user_model_rpm, config.user_model_tpm),
+    ]:
+        if provider in limits:
+            # the agent and the user share the provider, and with it one set of limits
+            rpm = min_limit(limits[provider][0], rpm)
+            tpm = min_limit(limits[provider][1], tpm)
+        limits[provider] = (rpm, tpm)
+    for provider, (rpm, tpm) in limits.items():
+        set_rate_limit(
+            provider,
+            rpm=rpm * share if rpm is not None else None,
+            tpm=tpm * share if tpm is not None else None,
+        )
+
+
+def min_limit(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None or b is None:
+        return b if a is None else a
+    return min(a, b)
 
 
 def agent_factory(
@@ -160,6 +448,7 @@ def agent_factory(
             model=config.model,
             provider=config.model_provider,
             temperature=config.temperature,
+            parallel_tool_calls=config.parallel_tool_calls,
         )
     elif config.agent_strategy == "act":
         # `act` from https://arxiv.org/abs/2210.03629
@@ -0,0 +1,55 @@
+# Copyright Sierra
+
+"""Longest-expected-first scheduling of the (task, trial) pairs of a run.
+
+A run's wall-clock time is set by its last episode to finish, so a long task that starts
+late leaves the other workers idle while it runs. Starting the tasks that took longest
+in earlier runs first lets the short ones fill in around them.
+"""
+
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tau_bench.checkpoint import load_checkpoint
+
+SCHEDULE_KEYS = ["turns", "duration"]
+
+
+def get_length(result: Dict[str, Any], key: str) -> Optional[float]:
+    info = result.get("info") or {}
+    if "error" in info:
+        # failed before or during the episode, so it says little about how long the task takes
+        return None
+    if key == "turns":
+        return len(result.get("traj") or [])
+    # only recorded by runs that time their episodes
+    return info.get("duration")
+
+
+def load_expected_lengths(paths: Sequence[str], key: str = "turns") -> Dict[int, float]:
+    """Returns the mean number of messages, or seconds, of each task in the results of
+    earlier runs of the same env and task split."""
+    if key not in SCHEDULE_KEYS:
+        raise ValueError(f"Unknown schedule key {key}, expected one of {SCHEDULE_KEYS}")
+    lengths: Dict[int, List[float]] = defaultdict(list)
+    for path in paths:
+        for result in load_checkpoint(path):
+            length = get_length(result, key)
+            if length is not None:
+                lengths[result["task_id"]].append(length)
+    return {task_id: statistics.mean(values) for task_id, values in lengths.items()}
+
+
+def order_longest_first(
+    pairs: List[Tuple[int, int]], expected_lengths: Dict[int, float]
+) -> List[Tuple[int, int]]:
+    """Orders the pairs by the expected length of their task, longest first.
+
+    Tasks without history are expected to take the mean length. The sort is stable, so
+    pairs of equally long tasks keep their order.
+    """
+    if not expected_lengths:
+        return list(pairs)
+    default = statistics.mean(expected_lengths.values())
+    return sorted(pairs, key=lambda pair: -expected_lengths.get(pair[0], default))
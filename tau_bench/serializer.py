@@ -0,0 +1,112 @@
+# Copyright Sierra
+
+"""JSON serialization of tool observations and result checkpoints.
+
+The default "json" serializer writes exactly what `json.dumps` does. "orjson" is several
+times faster, but writes compact JSON without ASCII escaping, so the observations shown to
+the agent differ in whitespace and escaping. Database hashes and ground truth keys never go
+through the serializer, so rewards are the same with either.
+"""
+
+import json
+from typing import IO, Any, Dict, Optional, Type
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Serializer(object):
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+    def loads(self, s: str) -> Any:
+        return json.loads(s)
+
+    def dump_results(
+        self,
+        obj: Any,
+        f: IO[str],
+        cls: Optional[Type[json.JSONEncoder]] = None,
+    ) -> None:
+        json.dump(obj, f, cls=cls, indent=2)
+
+    def dump_line(
+        self, obj: Any, cls: Optional[Type[json.JSONEncoder]] = None
+    ) -> str:
+        # compact JSON, which never contains a newline
+        return json.dumps(obj, cls=cls, separators=(",", ":"))
+
+
+class OrjsonSerializer(Serializer):
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # e.g. integers beyond 64 bits, which only the standard library handles
+            return super().dumps(obj)
+
+    def loads(self, s: str) -> Any:
+        return orjson.loads(s)
+
+    def dump_results(
+        self,
+        obj: Any,
+        f: IO[str],
+        cls: Optional[Type[json.JSONEncoder]] = None,
+    ) -> None:
+        try:
+            data = orjson.dumps(
+                obj,
+                default=cls().default if cls is not None else None,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            super().dump_results(obj, f, cls=cls)
+            return
+        f.write(data.decode("utf-8"))
+
+    def dump_line(
+        self, obj: Any, cls: Optional[Type[json.JSONEncoder]] = None
+    ) -> str:
+        try:
+            data = orjson.dumps(
+                obj,
+                default=cls().default if cls is not None else None,
+                option=orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().dump_line(obj, cls=cls)
+        return data.decode("utf-8")
+
+
+SERIALIZERS: Dict[str, Type[Serializer]] = {
+    Serializer.name: Serializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+}
+
+_serializer = Serializer()
+
+
+def set_serializer(name: str) -> Serializer:
+    global _serializer
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {name}")
+    if name == OrjsonSerializer.name and orjson is None:
+        # orjson is optional; without it everything goes through the standard library
+        name = Serializer.name
+    _serializer = SERIALIZERS[name]()
+    return _serializer
+
+
+def get_serializer() -> Serializer:
+    return _serializer
+
+
+def dumps(obj: Any) -> str:
+    return _serializer.dumps(obj)
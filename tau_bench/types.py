@@ -37,6 +37,9 @@ class RewardResult(BaseModel):
     reward: float
     info: Union[RewardOutputInfo, RewardActionInfo]
     actions: List[Action]
+    # how data hashes were computed, see tau_bench.envs.db.DATA_HASH_SCHEME; None in
+    # results from before data hashes were Merkle trees, whose hashes are not comparable
+    data_hash_scheme: Optional[str] = None
 
 
 class SolveResult(BaseModel):
@@ -55,7 +58,9 @@ class SolveResult(BaseModel):
 
 
 class EnvInfo(BaseModel):
-    task: Task
+    # None in lean step infos, see Env.lean_info; Env.get_info_task looks it up by task_id
+    task: Optional[Task] = None
+    task_id: Optional[int] = None
     source: Optional[str] = None
     user_cost: Optional[float] = None
     reward_info: Optional[RewardResult] = None
@@ -108,6 +113,22 @@ class RunConfig(BaseModel):
     task_ids: Optional[List[int]] = None
     log_dir: str = "results"
     max_concurrency: int = 1
+    num_processes: int = 1  # if > 1, tasks run in this many worker processes instead of max_concurrency threads
+    use_async: bool = False  # if True, episodes run in one event loop with up to max_concurrency at a time, instead of in threads
+    extra_tools: bool = False  # if True, the env also offers its opt-in tools, e.g. search_itineraries in airline
+    lean_step_info: bool = False  # if True, step infos only reference the task by id and the full task is attached to the result once
+    reward_processes: int = 0  # if > 0, ground truth replays for rewards run in this many processes, off the agent threads
+    parallel_tool_calls: bool = False  # if True, the tool-calling agent executes every tool call of a message instead of only the first
+    resume_path: Optional[str] = None  # a checkpoint of an earlier run with the same config, whose (task, trial) pairs are not run again
+    # requests and tokens per minute for each provider; when the agent and the user share a provider, the lower limits apply
+    model_rpm: Optional[int] = None
+    model_tpm: Optional[int] = None
+    user_model_rpm: Optional[int] = None
+    user_model_tpm: Optional[int] = None
+    # checkpoints of earlier runs of the same env and split; if set, the tasks that took longest in them start first
+    schedule_paths: Optional[List[str]] = None
+    schedule_by: str = "turns"  # "turns" or "duration", how the length of a task is measured in schedule_paths
+    serializer: str = "json"  # "orjson" is faster but its tool observations are not byte-identical, see tau_bench/serializer.py
     seed: int = 10
     shuffle: int = 0
     user_strategy: str = "llm"
@@ -120,3 +141,14 @@ class RunConfig(BaseModel):
                 "Exactly one of agent_strategy or custom_agent must be provided"
             )
         return self
+
+    @model_validator(mode="after")
+    def validate_processes(self):
+        # each worker process runs one episode at a time and grades it itself
+        if self.num_processes > 1 and (
+            self.use_async or self.reward_processes > 0 or self.max_concurrency > 1
+        ):
+            raise ValueError(
+                "use_async, reward_processes and max_concurrency > 1 cannot be combined with num_processes > 1"
+            )
+        return self
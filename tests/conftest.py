@@ -0,0 +1,6 @@
+# Copyright Sierra
+
+import os
+
+# litellm would otherwise fetch its model cost map over the network on import
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
@@ -0,0 +1,119 @@
+# Copyright Sierra
+
+import json
+import os
+from typing import List, Optional
+
+import pytest
+
+from tau_bench.agents.tool_calling_agent import ToolCallingAgent
+from tau_bench.checkpoint import CheckpointWriter, load_checkpoint
+from tau_bench.envs.base import Env
+from tau_bench.run import run
+from tau_bench.types import EnvRunResult, RunConfig, SolveResult
+
+RunConfig.model_rebuild()
+
+
+class ReplayAgent(ToolCallingAgent):
+    """Replays the ground truth actions of the task instead of calling an LLM."""
+
+    solved: List[int] = []
+
+    def solve(
+        self, env: Env, task_index: Optional[int] = None, max_num_steps: int = 30
+    ) -> SolveResult:
+        env.set_task(task_index)
+        for action in env.task.actions:
+            env.step(action)
+        reward_res = env.calculate_reward()
+        ReplayAgent.solved.append(task_index)
+        return SolveResult(
+            reward=reward_res.reward,
+            info={"reward_info": reward_res.model_dump()},
+            messages=[],
+        )
+
+
+def make_result(task_id: int, trial: int = 0, **info) -> EnvRunResult:
+    return EnvRunResult(task_id=task_id, reward=1.0, info=info, traj=[], trial=trial)
+
+
+def write_results(path: str, results: List[EnvRunResult]) -> None:
+    with CheckpointWriter(path) as writer:
+        for result in results:
+            writer.write(result)
+
+
+def test_writer_appends_results_in_order(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    write_results(path, [make_result(0), make_result(1)])
+    write_results(path, [make_result(2)])
+    assert [r["task_id"] for r in load_checkpoint(path)] == [0, 1, 2]
+
+
+def test_truncated_last_line_is_skipped_and_dropped(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    write_results(path, [make_result(0), make_result(1)])
+    with open(path, "a") as f:
+        f.write(json.dumps(make_result(2).model_dump())[:40])
+    assert [r["task_id"] for r in load_checkpoint(path)] == [0, 1]
+    write_results(path, [make_result(3)])
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)["task_id"] for line in lines] == [0, 1, 3]
+
+
+def test_disk_errors_are_raised_by_close(tmp_path, monkeypatch):
+    def fsync(fd: int) -> None:
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    with pytest.raises(OSError, match="No space left on device"):
+        write_results(str(tmp_path / "run.jsonl"), [make_result(0), make_result(1)])
+
+
+def test_last_result_of_a_pair_is_kept(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    write_results(path, [make_result(0, error="timeout"), make_result(1), make_result(0)])
+    results = load_checkpoint(path)
+    assert [(r["task_id"], r["info"]) for r in results] == [(0, {}), (1, {})]
+
+
+def test_resume_runs_the_missing_and_failed_pairs(tmp_path):
+    config = RunConfig(
+        model_provider="openai",
+        user_model_provider="openai",
+        model="gpt-4o",
+        agent_strategy=None,
+        custom_agent=ReplayAgent,
+        user_strategy="human",
+        env="retail",
+        task_split="test",
+        task_ids=[0, 1, 2, 3],
+        log_dir=str(tmp_path / "full"),
+    )
+    ReplayAgent.solved = []
+    full = run(config)
+    assert sorted(ReplayAgent.solved) == [0, 1, 2, 3]
+
+    # stopped after two results, a crashed episode and part of the last result
+    (stream_name,) = [
+        name for name in os.listdir(tmp_path / "full") if name.endswith(".jsonl")
+    ]
+    with open(tmp_path / "full" / stream_name) as f:
+        lines = {json.loads(line)["task_id"]: line for line in f}
+    path = str(tmp_path / "stopped.jsonl")
+    with open(path, "w") as f:
+        f.write(lines[0] + lines[1])
+        f.write(json.dumps(make_result(2, error="RateLimitError").model_dump()) + "\n")
+        f.write(lines[3][:40])
+
+    ReplayAgent.solved = []
+    resumed = run(config.model_copy(update={"resume_path": path}))
+    assert sorted(ReplayAgent.solved) == [2, 3]
+    assert [r.task_id for r in resumed] == [0, 1, 2, 3]
+    assert [r.reward for r in resumed] == [r.reward for r in full]
+    results = load_checkpoint(path)
+    assert sorted(r["task_id"] for r in results) == [0, 1, 2, 3]
+    assert not any("error" in r["info"] for r in results)
@@ -0,0 +1,107 @@
+# Copyright Sierra
+
+import copy
+
+import pytest
+
+from tau_bench.envs import get_env
+from tau_bench.envs.db import copy_on_write, hash_data, load_baseline
+from tau_bench.types import Action
+
+USER_ID = "noah_brown_6181"
+OLD_ZIP = "80279"
+PENDING_ORDER_ID = "#W5918442"
+NEW_ADDRESS = {
+    "address1": "1 Main Street",
+    "address2": "Apt 2",
+    "city": "New York",
+    "state": "NY",
+    "country": "USA",
+    "zip": "10001",
+}
+
+
+@pytest.fixture(scope="module")
+def env():
+    return get_env(
+        "retail",
+        user_strategy="human",
+        user_model="gpt-4o",
+        task_split="test",
+        task_index=0,
+    )
+
+
+def modify_address(env) -> str:
+    action = Action(
+        name="modify_user_address", kwargs={"user_id": USER_ID, **NEW_ADDRESS}
+    )
+    return env.step(action).observation
+
+
+def find_user(env, zip: str) -> str:
+    action = Action(
+        name="find_user_id_by_name_zip",
+        kwargs={"first_name": "Noah", "last_name": "Brown", "zip": zip},
+    )
+    return env.step(action).observation
+
+
+def materialize(data):
+    return {name: copy.deepcopy(dict(table.items())) for name, table in data.items()}
+
+
+def test_writes_stay_in_their_copy(env):
+    env.set_task(0)
+    other = copy_on_write(load_baseline(env.data_load_func))
+    modify_address(env)
+    assert env.data["users"][USER_ID]["address"]["zip"] == NEW_ADDRESS["zip"]
+    assert other["users"][USER_ID]["address"]["zip"] == OLD_ZIP
+    baseline = load_baseline(env.data_load_func)
+    assert baseline["users"][USER_ID]["address"]["zip"] == OLD_ZIP
+
+
+def test_rollback_restores_the_baseline_hash(env):
+    env.set_task(0)
+    baseline_hash = env.get_data_hash()
+    modify_address(env)
+    assert env.get_data_hash() != baseline_hash
+    env.rollback(env.initial_checkpoint)
+    assert env.get_data_hash() == baseline_hash
+    assert env.data["users"][USER_ID]["address"]["zip"] == OLD_ZIP
+
+
+def test_rollback_to_a_checkpoint_keeps_earlier_writes(env):
+    env.set_task(0)
+    modify_address(env)
+    checkpoint = env.checkpoint()
+    written_hash = env.get_data_hash()
+    env.step(
+        Action(
+            name="cancel_pending_order",
+            kwargs={"order_id": PENDING_ORDER_ID, "reason": "no longer needed"},
+        )
+    )
+    assert env.data["orders"][PENDING_ORDER_ID]["status"] == "cancelled"
+    env.rollback(checkpoint)
+    assert env.get_data_hash() == written_hash
+    assert env.data["orders"][PENDING_ORDER_ID]["status"] == "pending"
+    assert env.data["users"][USER_ID]["address"]["zip"] == NEW_ADDRESS["zip"]
+
+
+@pytest.mark.parametrize("task_index", range(5))
+def test_incremental_hash_matches_a_full_rehash(env, task_index):
+    env.set_task(task_index)
+    for action in env.task.actions:
+        env.step(action)
+    assert env.get_data_hash() == hash_data(materialize(env.data))
+
+
+def test_name_zip_index_sees_address_changes(env):
+    env.set_task(0)
+    assert find_user(env, OLD_ZIP) == USER_ID
+    modify_address(env)
+    assert find_user(env, NEW_ADDRESS["zip"]) == USER_ID
+    assert find_user(env, OLD_ZIP) == "Error: user not found"
+    env.rollback(env.initial_checkpoint)
+    assert find_user(env, OLD_ZIP) == USER_ID
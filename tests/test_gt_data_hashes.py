@@ -0,0 +1,64 @@
+# Copyright Sierra
+
+import json
+
+import pytest
+
+from tau_bench.envs import get_env
+from tau_bench.envs.db import DATA_HASH_SCHEME
+from tau_bench.envs.gt_data_hashes import (
+    GT_DATA_HASHES_FILE_NAME,
+    get_actions_key,
+    load_gt_data_hashes,
+)
+
+GT_DATA_HASHES = {"key": "hash"}
+
+
+def write_store(folder, fingerprint: str, scheme: str) -> str:
+    with open(folder / GT_DATA_HASHES_FILE_NAME, "w") as f:
+        json.dump(
+            {
+                "fingerprint": fingerprint,
+                "data_hash_scheme": scheme,
+                "gt_data_hashes": GT_DATA_HASHES,
+            },
+            f,
+        )
+    return str(folder)
+
+
+def test_store_is_used_when_fingerprint_and_scheme_match(tmp_path):
+    folder = write_store(tmp_path, "data", DATA_HASH_SCHEME)
+    assert load_gt_data_hashes(folder, "data") == GT_DATA_HASHES
+
+
+def test_store_is_ignored_when_the_data_changed(tmp_path):
+    folder = write_store(tmp_path, "data", DATA_HASH_SCHEME)
+    assert load_gt_data_hashes(folder, "changed data") == {}
+
+
+def test_store_is_ignored_when_the_hash_scheme_changed(tmp_path):
+    folder = write_store(tmp_path, "data", "sha256")
+    assert load_gt_data_hashes(folder, "data") == {}
+
+
+def test_missing_store_is_empty(tmp_path):
+    assert load_gt_data_hashes(str(tmp_path), "data") == {}
+
+
+@pytest.mark.parametrize("env_name", ["retail", "airline"])
+def test_stored_hashes_match_a_replay(env_name):
+    env = get_env(
+        env_name,
+        user_strategy="human",
+        user_model="gpt-4o",
+        task_split="test",
+        task_index=0,
+    )
+    assert env.gt_data_hashes, "the store is stale, rebuild it with build_gt_data_hashes.py"
+    for task in env.tasks[:10]:
+        env.task = task
+        assert env.compute_gt_data_hash() == env.gt_data_hashes[
+            get_actions_key(task.actions)
+        ]
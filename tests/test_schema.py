@@ -0,0 +1,74 @@
+# Copyright Sierra
+
+import pytest
+
+from tau_bench.envs import get_env
+from tau_bench.envs.gt_data_hashes import ENV_TASK_SPLITS
+from tau_bench.envs.schema import compile_validator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "count": {"type": "integer"},
+        "cabin": {"type": "string", "enum": ["economy", "business"]},
+        "passengers": {"type": "array", "items": {"$ref": "#/$defs/Passenger"}},
+    },
+    "required": ["count"],
+    "$defs": {
+        "Passenger": {
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+            "required": ["name"],
+        }
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "kwargs,error",
+    [
+        ({"count": 1}, None),
+        ({"count": 2.0}, None),
+        ({"count": 1, "passengers": [{"name": "Ada"}]}, None),
+        ({}, "missing required argument 'count'"),
+        ({"count": "1"}, "argument 'count' must be an integer, not string"),
+        ({"count": True}, "argument 'count' must be an integer, not boolean"),
+        (
+            {"count": 1, "cabin": "first"},
+            "argument 'cabin' must be one of ['economy', 'business'], not 'first'",
+        ),
+        (
+            {"count": 1, "passengers": [{"name": "Ada"}, {}]},
+            "missing required argument 'passengers[1].name'",
+        ),
+        ({"count": 1, "seat": "1A"}, "unexpected argument 'seat'"),
+    ],
+)
+def test_validator_errors(kwargs, error):
+    assert compile_validator(SCHEMA)(kwargs) == error
+
+
+def test_optional_arguments_may_be_left_out():
+    assert compile_validator(SCHEMA, optional=["count"])({}) is None
+
+
+@pytest.mark.parametrize(
+    "env_name,task_split",
+    [
+        (env_name, task_split)
+        for env_name, task_splits in ENV_TASK_SPLITS.items()
+        for task_split in task_splits
+    ],
+)
+def test_ground_truth_actions_are_valid(env_name, task_split):
+    env = get_env(
+        env_name,
+        user_strategy="human",
+        user_model="gpt-4o",
+        task_split=task_split,
+        task_index=0,
+    )
+    for task in env.tasks:
+        for action in task.actions:
+            if action.name in env.tool_validators:
+                assert env.tool_validators[action.name](action.kwargs) is None